@@ -1,23 +1,35 @@
-from flask import Flask, abort, request, redirect, session, jsonify
+from flask import Flask, abort, request, redirect, session, jsonify, stream_with_context
 from flask_cors import CORS
 import json
 import urllib
 from authlib.integrations.flask_client import OAuth
-from pymongo import MongoClient
-from datetime import datetime, timedelta
+import mongo
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import ConnectionFailure
+from json_provider import MongoJSONProvider
+from datetime import datetime
 import os
 from dotenv import load_dotenv
 import uuid
-from google import genai
-import itertools
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
-from icalendar import Calendar, Event as CalendarEvent
-import pytz
-from bson import ObjectId
-from flask.json import JSONEncoder
+from events import hydrate_events
+from queue_stats import QueueStats
+from matchmaking import (
+    add_waiting_user,
+    events_collection,
+    locations_collection,
+    match_status,
+    queue_index,
+    smtp_pool,
+    start_background_workers,
+    waiting_expiry,
+    waiting_users_collection,
+)
+from feature_extraction import PROMPT_VERSION
+from feature_cache import FeatureCache
+from scorers import FeatureScorer, GeminiScorer, LocalScorer
+from profile_cache import ProfileCache, identity_key
+from indexes import ensure_indexes, check_query_plans
 
 # Load environment variables
 load_dotenv()
@@ -31,11 +43,19 @@ CORS(
 )
 
 
-# MongoDB setup
-client = MongoClient(os.getenv('MONGO_URL'))
-db = client["NightSpot"]
-dbs = client.NightSpot
-collection = dbs["users"]
+# MongoDB setup: one shared, fork-safe client for the whole process
+collection = mongo.collection("users")
+
+# Pre-serialized profile reads, keyed by token (/api/user/profile) or
+# session (/auth/me); invalidate_profile() must follow every user write
+PROFILE_CACHE_TTL = float(os.getenv('PROFILE_CACHE_TTL', 300))
+token_profile_cache = ProfileCache(collection, ['email', 'name', 'picture'], ttl=PROFILE_CACHE_TTL)
+session_profile_cache = ProfileCache(collection, ttl=PROFILE_CACHE_TTL)
+
+
+def invalidate_profile(email):
+    token_profile_cache.invalidate(email)
+    session_profile_cache.invalidate(email)
 
 # OAuth setup
 oauth = OAuth(app)
@@ -55,19 +75,36 @@ google = oauth.register(
 
 )
 
-# Add these environment variables at the top with other env vars
-SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-SMTP_PORT = int(os.getenv('SMTP_PORT', 587))
-SMTP_USERNAME = os.getenv('SMTP_USERNAME')
-SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
-
-class MongoJSONEncoder(JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        return super().default(obj)
-
-app.json_encoder = MongoJSONEncoder
+# Score all questionnaire answers in one Gemini request instead of one per answer
+FEATURE_EXTRACTION_BATCH = os.getenv('FEATURE_EXTRACTION_BATCH', 'true').lower() == 'true'
+# Extracted scores are cached in memory (FEATURE_CACHE_SIZE entries for
+# FEATURE_CACHE_TTL seconds) and in the feature_cache collection
+FEATURE_CACHE_SIZE = int(os.getenv('FEATURE_CACHE_SIZE', 10000))
+FEATURE_CACHE_TTL = float(os.getenv('FEATURE_CACHE_TTL', 3600))
+# How answers are scored: "remote" (Gemini, falling back to the local
+# lexicon), "local" (lexicon only) or "local_first" (lexicon now, Gemini
+# refinement in the background)
+FEATURE_SCORER = os.getenv('FEATURE_SCORER', 'remote')
+
+# GET /queue returns QUEUE_PAGE_SIZE users per page unless asked for fewer,
+# and never more than QUEUE_MAX_PAGE_SIZE
+QUEUE_PAGE_SIZE = int(os.getenv('QUEUE_PAGE_SIZE', 100))
+QUEUE_MAX_PAGE_SIZE = int(os.getenv('QUEUE_MAX_PAGE_SIZE', 1000))
+
+# A long-polled status request is held for at most STATUS_MAX_WAIT seconds.
+# Status streams re-check Mongo (and send a keep-alive) every
+# STATUS_STREAM_HEARTBEAT seconds, which also catches groups formed by
+# another process
+STATUS_MAX_WAIT = float(os.getenv('STATUS_MAX_WAIT', 30))
+STATUS_STREAM_HEARTBEAT = float(os.getenv('STATUS_STREAM_HEARTBEAT', 15))
+
+# GET /queue/stats is recomputed at most every QUEUE_STATS_TTL seconds; the
+# match rate covers the last MATCH_RATE_WINDOW seconds
+QUEUE_STATS_TTL = float(os.getenv('QUEUE_STATS_TTL', 10))
+MATCH_RATE_WINDOW = int(os.getenv('MATCH_RATE_WINDOW', 3600))
+
+# Encode ObjectId and datetime natively in every JSON response
+app.json = MongoJSONProvider(app)
 
 @app.route('/auth/google')
 def auth_google():
@@ -103,11 +140,11 @@ def auth_callback():
         # Get user info from Google
         user_info = google.get('userinfo').json()
         # Check if user exists in database
-        existing_user = db.users.find_one({'email': user_info['email']})
+        existing_user = collection.find_one({'email': user_info['email']})
 
         if existing_user:
             # Update existing user data
-            db.users.update_one(
+            collection.update_one(
                 {'email': user_info['email']},
                 {'$set': {
                     'last_login': datetime.utcnow(),
@@ -127,10 +164,12 @@ def auth_callback():
                 'last_login': datetime.utcnow(),
                 'is_onboarded': False
             }
-            result = db.users.insert_one(new_user)
+            result = collection.insert_one(new_user)
             user_id = str(result.inserted_id)
             is_onboarded = False
 
+        invalidate_profile(user_info['email'])
+
         # Prepare user info for session
         user_session_data = {
             'id': user_id,
@@ -176,19 +215,19 @@ def get_user_profile():
         return jsonify({'error': 'No token provided'}), 401
 
     try:
-        # Verify token and get user info
-        user_info = google.parse_id_token(token)
-        user = db.users.find_one({'email': user_info['email']})
-
-        if not user:   
+        # A token seen in the last PROFILE_CACHE_TTL seconds skips verification and
+        # Mongo, but never past the token's own expiry
+        key = identity_key('token', token)
+        body = token_profile_cache.get(key)
+        if body is None:
+            # Verify token and get user info
+            user_info = google.parse_id_token(token)
+            body = token_profile_cache.load(key, user_info['email'], expires_at=user_info.get('exp'))
+
+        if body is None:
             return jsonify({'error': 'User not found'}), 404
 
-        return jsonify({
-            'id': str(user['_id']),
-            'email': user['email'],
-            'name': user.get('name'),
-            'picture': user.get('picture')
-        })
+        return app.response_class(body, mimetype='application/json')
 
     except Exception as e:
         return jsonify({'error': str(e)}), 401
@@ -200,19 +239,17 @@ def auth_me():
     if not user_session:
         return jsonify({'error': 'Not authenticated'}), 401
         
-    user = collection.find_one({"email": user_session['email']})
+    user = session_profile_cache.get_or_load(identity_key('session', user_session['id']), user_session['email'])
     if not user:
         return jsonify({'error': 'User not found'}), 404
         
-    user["id"] = str(user.pop("_id"))
     token = session.get('token')
     if not token:
         return jsonify({'error': 'No token found'}), 401
 
-    return jsonify({
-        'user': user,
-        'token': token
-    })
+    # The cached user is already JSON, so only the token is encoded here
+    body = f'{{"user":{user},"token":{json.dumps(token)}}}'
+    return app.response_class(body, mimetype='application/json')
 
 
 @app.route('/auth/logout', methods=['POST'])
@@ -229,41 +266,12 @@ def update_user(user_email):
         abort(400, description="No update data provided")
 
     try:
-        # Extract features from questions
+        # Extract features from questions, skipping empty answers
         questions = data.get('questions', [])
-        total_extroversion = 0
-        total_openness = 0
-        total_spontaneity = 0
-        total_energy_level = 0
-        count = 0
-
-        for question, answer in questions:
-            if answer:  # Only process non-empty answers
-                response = extract_features(question, answer)
-                lines = response.strip().splitlines()
-                feature_scores = {}
-                for line in lines:
-                    if ':' in line:
-                        category, value = line.split(':', 1)
-                        try:
-                            feature_scores[category.strip()] = float(value.strip())
-                        except ValueError:
-                            feature_scores[category.strip()] = 0.0
-                
-                total_extroversion += feature_scores.get('extroversion', 0.0)
-                total_openness += feature_scores.get('openness', 0.0)
-                total_spontaneity += feature_scores.get('spontaneity', 0.0)
-                total_energy_level += feature_scores.get('energy_level', 0.0)
-                count += 1
-
-        # Compute average scores if at least one question was answered
-        if count > 0:
-            avg_extroversion = total_extroversion / count
-            avg_openness = total_openness / count
-            avg_spontaneity = total_spontaneity / count
-            avg_energy_level = total_energy_level / count
-        else:
-            avg_extroversion = avg_openness = avg_spontaneity = avg_energy_level = 0.0
+        answered = [(question, answer) for question, answer in questions if answer]
+
+        # Refined scores are requested once the local ones are stored, so they win
+        scores = feature_scorer.score(answered, refine=False)
 
         # Update user data
         update_data = {
@@ -271,10 +279,7 @@ def update_user(user_email):
             "gender": data.get('gender'),
             "race": data.get('race'),
             "hometown": data.get('hometown'),
-            "extroversion": avg_extroversion,
-            "openness": avg_openness,
-            "spontaneity": avg_spontaneity,
-            "energy_level": avg_energy_level,
+            **scores,
             "is_onboarded": True
         }
 
@@ -282,15 +287,22 @@ def update_user(user_email):
             {"email": user_email}, 
             {"$set": update_data}
         )
+        invalidate_profile(user_email)
         
         if result.matched_count == 0:
             abort(404, description="User not found")
 
+        def save_refined_scores(refined):
+            collection.update_one({"email": user_email}, {"$set": refined})
+            invalidate_profile(user_email)
+
+        feature_scorer.refine(answered, save_refined_scores)
+
         updated_user = collection.find_one({"email": user_email})
         if not updated_user:
             abort(500, description="Error fetching updated user")
 
-        updated_user["id"] = str(updated_user.pop("_id"))
+        updated_user["id"] = updated_user.pop("_id")
         return jsonify({"data": updated_user}), 200
 
     except Exception as e:
@@ -298,207 +310,69 @@ def update_user(user_email):
         abort(500, description="User update failed")
 
 
+@app.get('/users/<user_email>/events')
+def get_user_events(user_email):
+    """
+    Returns a user's events, newest first, with members and venues filled
+    in by one query per collection.
+    """
+    try:
+        limit = min(int(request.args.get('limit', QUEUE_PAGE_SIZE)), QUEUE_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    events = events_collection.find(
+        {"$or": [{"members.email": user_email}, {"users.email": user_email}]},
+        {"email_status": 0, "email_attempts": 0, "email_error": 0}
+    ).sort("_id", -1).limit(limit)
+    return jsonify({"data": hydrate_events(events, collection, locations_collection)})
+
 @app.get('/users/<user_email>')
 def get_user(user_email):
     user = collection.find_one({"email": user_email})
     if not user:
         abort(404, description="User not found")
-    user["id"] = str(user.pop("_id"))
+    user["id"] = user.pop("_id")
     return jsonify({"data": user}), 200
 
-# MongoDB connection details
-MONGO_URL = os.getenv("MONGO_URL")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-client = MongoClient(MONGO_URL)
-db = client['NightSpot']
-waiting_users_collection = db['waiting_users']
-events_collection = db['events']
-locations_collection = db['locations']  # Add locations collection
-
-
-def serialize_doc(doc):
-    """
-    Convert MongoDB ObjectId in a document to string.
-    """
-    if doc is None:
-        return None
-    # Convert the Mongo-generated _id field if it exists.
-    if '_id' in doc:
-        doc['_id'] = str(doc['_id'])
-    return doc
-
-def serialize_docs(docs):
-    """
-    Serialize a list of documents.
-    """
-    return [serialize_doc(doc) for doc in docs]
-
-
-def extract_features(question, answer):
-    client = genai.Client(api_key = GEMINI_API_KEY)
-    
-    prompt_text = f"""You are a specialist in the human psyche and you can determine someone personality from short responses.
-    The way you evaluate the change is writing a report scoring from 0 to 5 the response in four categories: extroversion, openness, spontaneity and energy_level.
-    0 means the absolute lowest level of the category possible. A 0 extroversion person absolutely despises being with other people.
-    5 means the absolute peak of the category. A 5 openness person would be open to essentially anything.
-    Don't be afraid of giving scores that end with values other than .5 and .0
-    You should only output the name of the category, a colon, a space, and the score. 
-
-    The formatting of the response should be the following (example with dummy values):
-    extroversion: 2.2
-    openness: 4.6
-    spontaneity: 0.0
-    energy_level: 5.0
-
-    A client of yours was tasked to respond to the following question:
-    {question}
-
-    And they gave the following answer:
-    {answer}
-
-    Give your response in the specified format. 
-    """
-
-    return client.models.generate_content(
-    model="gemini-2.0-flash", contents=prompt_text
-    ).text
-
-def fetch_waiting_users_by_meeting_time(meeting_time):
-    """
-    Fetch all waiting users for a given meeting time.
-    """
-    users = list(waiting_users_collection.find({"meeting_time": meeting_time}))
-    return users
-
-def is_similar_group(group, threshold=2.5):
-    """
-    Check if a group of users is similar based on the features:
-    dummy1, dummy2, dummy3, dummy4.
-    
-    A group is considered similar if for each dummy feature, the difference 
-    between the maximum and minimum values does not exceed the threshold.
-    """
-    features = ["dummy1", "dummy2", "dummy3", "dummy4"]
-    for feature in features:
-        values = [user.get(feature, 0) for user in group]
-        if max(values) - min(values) > threshold:
-            return False
-    return True
-
-def find_eligible_group(users, group_size=5, threshold=1.0):
-    """
-    Find any group of `group_size` users (from a given meeting time queue) 
-    that are similar enough based on the dummy features.
-    
-    This function uses itertools.combinations to try every group of 5 users.
-    """
-    for group in itertools.combinations(users, group_size):
-        if is_similar_group(group, threshold):
-            return list(group)
-    return None
+# Cache of extracted feature scores, shared across workers through Mongo
+feature_cache = FeatureCache(
+    mongo.collection('feature_cache'),
+    PROMPT_VERSION,
+    max_size=FEATURE_CACHE_SIZE,
+    ttl=FEATURE_CACHE_TTL
+)
 
-def get_random_location():
-    """Get a random location from the locations collection"""
-    try:
-        # Use MongoDB's aggregation pipeline to get a random document
-        pipeline = [{"$sample": {"size": 1}}]
-        location = list(locations_collection.aggregate(pipeline))
-        if location:
-            return location[0]
-        return {"name": "Evanston", "address": "1501 Maple Ave, Evanston, IL 60201"}  # Default fallback
-    except Exception as e:
-        print(f"Error getting random location: {str(e)}")
-        return {"name": "Evanston", "address": "1501 Maple Ave, Evanston, IL 60201"}  # Default fallback
-
-def create_calendar_invite(meeting_time, group_members, location):
-    """Create a calendar invite for the event"""
-    cal = Calendar()
-    cal.add('prodid', '-//NightSpot Event//nightspot.com//')
-    cal.add('version', '2.0')
-    
-    event = CalendarEvent()
-    event.add('summary', 'NightSpot Group Meetup')
-    
-    # Convert meeting_time string to datetime
-    start_time = datetime.strptime(meeting_time, "%Y-%m-%d %H:%M")
-    end_time = start_time + timedelta(hours=2)  # Default 2-hour event
-    
-    # Add timezone information
-    tz = pytz.timezone('America/Chicago')
-    start_time = tz.localize(start_time)
-    end_time = tz.localize(end_time)
-    
-    event.add('dtstart', start_time)
-    event.add('dtend', end_time)
-    
-    # Add description with group members and location
-    description = "Your NightSpot group meetup!\n\nLocation:\n"
-    description += f"{location['name']}\n{location['address']}\n\nGroup Members:\n"
-    for member in group_members:
-        description += f"- {member['name']}\n"
-    event.add('description', description)
-    
-    # Add location
-    event.add('location', f"{location['name']} - {location['address']}")
-    
-    cal.add_component(event)
-    return cal.to_ical()
+feature_scorer = FeatureScorer(
+    GeminiScorer(batch=FEATURE_EXTRACTION_BATCH, cache=feature_cache),
+    LocalScorer(),
+    policy=FEATURE_SCORER
+)
 
-def send_group_emails(group, meeting_time, event_id):
-    """Send emails to all group members with calendar invite"""
+# Create the declared indexes and check every known query uses one.
+# INDEX_CHECK=strict refuses to start on a collection scan or without the
+# database, "warn" only logs either, "off" skips both.
+INDEX_CHECK = os.getenv('INDEX_CHECK', 'warn')
+if INDEX_CHECK != 'off':
     try:
-        # Get a random location for the meetup
-        location = get_random_location()
-        
-        # Create calendar invite with location
-        calendar_invite = create_calendar_invite(meeting_time, group, location)
-        
-        # Connect to SMTP server
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SMTP_USERNAME, SMTP_PASSWORD)
-        
-        for user in group:
-            # Create email message
-            msg = MIMEMultipart()
-            msg['From'] = SMTP_USERNAME
-            msg['To'] = user['email']
-            msg['Subject'] = 'Your NightSpot Group has been Matched!'
-            
-            # Email body
-            body = f"""Hi {user['name']},
-
-Great news! We've found your perfect group for a night out!
-
-Meeting Location:
-{location['name']}
-{location['address']}
-
-Your group is scheduled to meet at {meeting_time}.
-
-Your group members are:
-"""
-            for member in group:
-                if member['email'] != user['email']:
-                    body += f"- {member['name']}\n"
-            
-            body += "\nWe've attached a calendar invite for your convenience. Looking forward to your amazing night out!"
-            
-            msg.attach(MIMEText(body, 'plain'))
-            
-            # Attach calendar invite
-            cal_attachment = MIMEApplication(calendar_invite, _subtype='ics')
-            cal_attachment.add_header('Content-Disposition', 'attachment', filename='nightspot_event.ics')
-            msg.attach(cal_attachment)
-            
-            # Send email
-            server.send_message(msg)
-        
-        server.quit()
-        return True, location
-    except Exception as e:
-        print(f"Error sending emails: {str(e)}")
-        return False, None
+        ensure_indexes(mongo.db)
+        check_query_plans(mongo.db, strict=INDEX_CHECK == 'strict')
+    except ConnectionFailure as e:
+        if INDEX_CHECK == 'strict':
+            raise
+        print(f"Skipping index check, database unreachable: {str(e)}")
+
+queue_stats = QueueStats(waiting_users_collection, events_collection, ttl=QUEUE_STATS_TTL, window=MATCH_RATE_WINDOW)
+
+
+# The workers run from process start, so users already waiting are grouped
+# after a restart without anyone new joining. The debug reloader's parent
+# process only watches files and never runs them; a worker forked from a
+# preloaded app (e.g. gunicorn --preload) starts its own, since threads do
+# not survive fork. BACKGROUND_WORKERS=false turns them off entirely.
+BACKGROUND_WORKERS = os.getenv('BACKGROUND_WORKERS', 'true').lower() == 'true'
+if BACKGROUND_WORKERS and not (__name__ == '__main__' and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'):
+    start_background_workers()
+    os.register_at_fork(after_in_child=start_background_workers)
 
 @app.route('/join', methods=['POST'])
 def join_queue():
@@ -528,40 +402,19 @@ def join_queue():
             "extroversion": float(extroversion),
             "openness": float(openness),
             "spontaneity": float(spontaneity),
-            "energy_level": float(energy_level)
+            "energy_level": float(energy_level),
+            "expires_at": waiting_expiry(meeting_time)
         }
         waiting_users_collection.insert_one(new_user)
-        
-        # Fetch only the waiting users for this meeting time
-        users_for_time = fetch_waiting_users_by_meeting_time(meeting_time)
-        
-        # Try to find an eligible group of 5 similar users in the same meeting time queue
-        eligible_group = find_eligible_group(users_for_time)
-        
-        if eligible_group:
-            # Remove the eligible users from the waiting collection
-            eligible_ids = [user['id'] for user in eligible_group]
-            waiting_users_collection.delete_many({"id": {"$in": eligible_ids}})
-            
-            # Send emails to all group members and get the location
-            email_sent, location = send_group_emails(eligible_group, meeting_time, str(uuid.uuid4()))
-            
-            # Create and store an event document
-            event_doc = {
-                "event_id": str(uuid.uuid4()),
-                "users": eligible_group,
-                "meeting_time": meeting_time,
-                "location": location
-            }
-            events_collection.insert_one(event_doc)
-            
-            return jsonify({
-                "event": event_doc, 
-                "detail": "Event created with similar users for the specified meeting time!",
-                "emails_sent": email_sent
-            })
-        else:
-            return jsonify({"event": None, "detail": "Added to queue for meeting time, waiting for more users."})
+
+        # Groups are formed by the matching rounds; wake one early if the queue is big enough
+        add_waiting_user(new_user)
+
+        return jsonify({
+            "event": None,
+            "queue_id": new_user["id"],
+            "detail": "Added to queue for meeting time, waiting for more users."
+        })
             
     except Exception as e:
         print(f"Error in join_queue: {str(e)}")
@@ -570,11 +423,112 @@ def join_queue():
 @app.route('/queue', methods=['GET'])
 def get_queue():
     """
-    Returns the list of all waiting users across meeting times.
+    Returns waiting users one page at a time, ordered by _id.
+
+    Query parameters:
+        meeting_time  only return users waiting for this meeting time
+        after         the next_cursor of the previous page
+        limit         page size (default QUEUE_PAGE_SIZE, at most QUEUE_MAX_PAGE_SIZE)
+        fields        comma-separated fields to return; _id is always included
+        format=ndjson stream every matching user as one JSON document per line,
+                      ignoring limit, instead of returning a page
     """
-    users = list(waiting_users_collection.find())
-    users = serialize_docs(users)
-    return jsonify(users)
+    query = {}
+    if request.args.get('meeting_time'):
+        query["meeting_time"] = request.args['meeting_time']
+    if request.args.get('after'):
+        try:
+            query["_id"] = {"$gt": ObjectId(request.args['after'])}
+        except InvalidId:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+    projection = None
+    if request.args.get('fields'):
+        projection = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+
+    try:
+        limit = min(int(request.args.get('limit', QUEUE_PAGE_SIZE)), QUEUE_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+
+    if request.args.get('format') == 'ndjson':
+        cursor = waiting_users_collection.find(query, projection).sort("_id", 1).batch_size(QUEUE_PAGE_SIZE)
+
+        def generate():
+            with cursor:
+                for user in cursor:
+                    yield app.json.dumpb(user) + b"\n"
+
+        return app.response_class(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    users = list(waiting_users_collection.find(query, projection).sort("_id", 1).limit(limit))
+    next_cursor = users[-1]["_id"] if len(users) == limit else None
+    return jsonify({"data": users, "next_cursor": next_cursor})
+
+@app.route('/queue/stats', methods=['GET'])
+def get_queue_stats():
+    """
+    Returns waiting counts, oldest wait and score histograms per meeting
+    time, and the recent match rate, without reading the queue itself.
+    """
+    try:
+        return jsonify(queue_stats.get())
+    except Exception as e:
+        print(f"Error computing queue stats: {str(e)}")
+        return jsonify({"error": "Failed to compute queue stats"}), 500
+
+@app.route('/queue/<entry_id>/status', methods=['GET'])
+def get_queue_status(entry_id):
+    """
+    Returns whether one waiting entry (the queue_id from /join) has been
+    matched, with its event once it has.
+
+    With ?wait=N the request is held for up to N seconds (at most
+    STATUS_MAX_WAIT) while the entry is still waiting, and answered as soon
+    as its group is formed.
+    """
+    status = match_status.lookup(entry_id)
+    if status is None:
+        return jsonify({"error": "Queue entry not found"}), 404
+
+    try:
+        wait = min(float(request.args.get('wait', 0)), STATUS_MAX_WAIT)
+    except ValueError:
+        return jsonify({"error": "wait must be a number"}), 400
+    if status["status"] == "waiting" and wait > 0:
+        match_status.wait(entry_id, wait)
+        status = match_status.lookup(entry_id) or status
+    return jsonify(status)
+
+@app.route('/queue/<entry_id>/events', methods=['GET'])
+def stream_queue_status(entry_id):
+    """
+    Server-Sent Events version of /queue/<entry_id>/status. Sends a
+    "waiting" event, then a "matched" event with the event document once
+    the entry's group is formed (or "expired" if its meeting time passed
+    first), and closes the stream.
+    """
+    if match_status.lookup(entry_id) is None:
+        return jsonify({"error": "Queue entry not found"}), 404
+
+    def generate():
+        while True:
+            status = match_status.lookup(entry_id)
+            if status is None:
+                yield b"event: gone\ndata: {}\n\n"
+                return
+            yield b"event: " + status["status"].encode() + b"\ndata: " + app.json.dumpb(status) + b"\n\n"
+            if status["status"] != "waiting":
+                return
+            match_status.wait(entry_id, STATUS_STREAM_HEARTBEAT)
+
+    return app.response_class(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.route('/queue', methods=['DELETE'])
 def clear_queue():
@@ -582,53 +536,38 @@ def clear_queue():
     Clears all users from the waiting queue. Useful for testing or administrative purposes.
     """
     waiting_users_collection.delete_many({})
+    queue_index.clear()
     return jsonify({"detail": "Queue cleared."})
 
+@app.route('/email/stats', methods=['GET'])
+def email_stats():
+    """
+    Returns SMTP pool usage and per-connection throughput, for sizing the pool.
+    """
+    return jsonify(smtp_pool.stats())
+
+@app.route('/db/stats', methods=['GET'])
+def db_stats():
+    """
+    Returns Mongo connection pool usage for this worker process.
+    """
+    return jsonify(mongo.stats())
+
 @app.route('/get_features', methods=['POST'])
 def get_features():
     data = request.json
     questions = data['questions']
-    total_extroversion = 0
-    total_openness = 0
-    total_spontaneity = 0
-    total_energy_level = 0
-
-    count = 0
-
-    for question, answer in questions:
-        response = extract_features(question, answer)
-        lines = response.strip().splitlines()
-        feature_scores = {}
-        for line in lines:
-            if ':' in line:
-                category, value = line.split(':', 1)
-                try:
-                    feature_scores[category.strip()] = float(value.strip())
-                except ValueError:
-                    feature_scores[category.strip()] = 0.0
-        
-        total_extroversion += feature_scores.get('extroversion', 0.0)
-        total_openness += feature_scores.get('openness', 0.0)
-        total_spontaneity += feature_scores.get('spontaneity', 0.0)
-        total_energy_level += feature_scores.get('energy_level', 0.0)
-        count += 1
-
-    # Compute average scores if at least one question was provided
-    if count > 0:
-        avg_extroversion = total_extroversion / count
-        avg_openness = total_openness / count
-        avg_spontaneity = total_spontaneity / count
-        avg_energy_level = total_energy_level / count
-    else:
-        avg_extroversion = avg_openness = avg_spontaneity = avg_energy_level = 0.0
-
-    return jsonify({
-        "extroversion": avg_extroversion,
-        "openness": avg_openness,
-        "spontaneity": avg_spontaneity,
-        "energy_level": avg_energy_level
-    })
-    
+
+    # Scored by the configured policy; remote scores are cached per answer
+    return jsonify(feature_scorer.score(questions))
+
+@app.route('/features/stats', methods=['GET'])
+def feature_cache_stats():
+    """
+    Returns hit/miss counts for the feature extraction cache.
+    """
+    return jsonify(feature_cache.stats())
+
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5001))
@@ -1,9 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from starlette.middleware.sessions import SessionMiddleware
 from app.core.config import settings
 from app.api.api_v1.api import api_router
 from app.db.mongodb import connect_to_mongo, close_mongo_connection
+from app.core.provider_metadata import provider_metadata
+from matchmaking import start_background_workers
 
 def create_application() -> FastAPI:
     app = FastAPI(
@@ -26,13 +29,24 @@ def create_application() -> FastAPI:
     # Include API router
     app.include_router(api_router, prefix=settings.API_V1_STR)
 
+    @app.get("/ready")
+    async def ready():
+        """Readiness probe: 503 until identity-provider metadata is loaded"""
+        readiness = provider_metadata.readiness()
+        return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
     # Add startup and shutdown events
     @app.on_event("startup")
     async def startup_event():
         await connect_to_mongo()
+        provider_metadata.start()
+        # Group users who joined through this app, and deliver their emails
+        if settings.BACKGROUND_WORKERS:
+            start_background_workers()
 
     @app.on_event("shutdown")
     async def shutdown_event():
+        await provider_metadata.stop()
         await close_mongo_connection()
 
     return app 
\ No newline at end of file
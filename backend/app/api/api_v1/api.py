@@ -1,6 +1,8 @@
 from fastapi import APIRouter
-from app.api.api_v1.endpoints import auth, users
+from app.api.api_v1.endpoints import auth, features, queue, users
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
-api_router.include_router(users.router, prefix="/users", tags=["users"]) 
\ No newline at end of file
+api_router.include_router(users.router, prefix="/users", tags=["users"])
+api_router.include_router(queue.router, tags=["queue"])
+api_router.include_router(features.router, tags=["features"])
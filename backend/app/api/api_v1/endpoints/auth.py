@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.responses import RedirectResponse
-from app.core.security import get_current_user
+from app.core.security import get_current_user, oauth2_scheme
+from app.core.token_cache import token_cache
+from app.core.provider_metadata import provider_metadata
 from app.core.config import settings
 from app.db.mongodb import mongodb
 from datetime import datetime
+import time
 import uuid
 import json
 from authlib.integrations.starlette_client import OAuth
@@ -24,6 +27,17 @@ oauth.register(
     }
 )
 
+# Serve Google's metadata and keys from the provider metadata store so
+# authlib never fetches them on the login path
+provider_metadata.on_update(
+    'google_openid',
+    lambda document: oauth.google.server_metadata.update({**document, '_loaded_at': time.time()})
+)
+provider_metadata.on_update(
+    'google_jwks',
+    lambda document: oauth.google.server_metadata.update({'jwks': document})
+)
+
 @router.get("/public")
 async def public_route():
     return {"message": "Public endpoint - Hello!"}
@@ -32,6 +46,18 @@ async def public_route():
 async def private_route(current_user: dict = Depends(get_current_user)):
     return {"message": "Private endpoint - Hello!", "user": current_user}
 
+@router.post("/logout")
+async def logout(current_user: dict = Depends(get_current_user), token: str = Depends(oauth2_scheme)):
+    """
+    Revoke the bearer token so it is rejected even before it expires
+    """
+    token_cache.revoke(token, current_user.get("exp"))
+    return {"message": "Logged out"}
+
+@router.get("/token-cache")
+async def token_cache_stats():
+    return token_cache.stats()
+
 @router.get("/google")
 async def auth_google(request: Request):
     """
@@ -0,0 +1,18 @@
+from typing import List, Tuple
+
+from fastapi import APIRouter
+from pydantic import BaseModel
+
+from app.services.features import feature_scorer
+
+router = APIRouter()
+
+
+class FeatureRequest(BaseModel):
+    questions: List[Tuple[str, str]]
+
+
+@router.post("/get_features")
+async def get_features(request: FeatureRequest):
+    """Averaged feature scores for a list of (question, answer) pairs"""
+    return await feature_scorer.score_async(request.questions)
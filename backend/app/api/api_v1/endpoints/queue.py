@@ -0,0 +1,90 @@
+import asyncio
+import uuid
+from typing import Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.responses import MongoJSONResponse
+from app.db.mongodb import mongodb
+from json_provider import dumpb
+from matchmaking import add_waiting_user, waiting_expiry
+
+router = APIRouter()
+
+
+class JoinRequest(BaseModel):
+    name: str
+    email: str
+    meeting_time: str
+    extroversion: float
+    openness: float
+    spontaneity: float
+    energy_level: float
+
+
+@router.post("/join")
+async def join_queue(request: JoinRequest):
+    """
+    Add a user to the waiting queue.
+
+    Groups are formed by the matching rounds this process starts at
+    startup (see matchmaking); the entry is added to their queue index so
+    a round can pick it up without re-reading the collection.
+    """
+    new_user = {
+        "id": str(uuid.uuid4()),
+        **request.model_dump(),
+        "expires_at": waiting_expiry(request.meeting_time)
+    }
+    await mongodb.db.waiting_users.insert_one(new_user)
+    # The index may load the meeting time from Mongo on first use
+    await asyncio.to_thread(add_waiting_user, new_user)
+    return {
+        "event": None,
+        "queue_id": new_user["id"],
+        "detail": "Added to queue for meeting time, waiting for more users."
+    }
+
+
+@router.get("/queue")
+async def get_queue(
+    meeting_time: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(settings.QUEUE_PAGE_SIZE, ge=1),
+    fields: Optional[str] = None,
+    format: Optional[str] = None,
+):
+    """
+    Waiting users one page at a time, ordered by _id, with the same
+    parameters as the Flask endpoint. format=ndjson streams every match.
+    """
+    query = {}
+    if meeting_time:
+        query["meeting_time"] = meeting_time
+    if after:
+        try:
+            query["_id"] = {"$gt": ObjectId(after)}
+        except InvalidId:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    projection = None
+    if fields:
+        projection = [field.strip() for field in fields.split(',') if field.strip()]
+
+    cursor = mongodb.db.waiting_users.find(query, projection).sort("_id", 1)
+    if format == "ndjson":
+        async def generate():
+            async for user in cursor.batch_size(settings.QUEUE_PAGE_SIZE):
+                yield dumpb(user) + b"\n"
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+    limit = min(limit, settings.QUEUE_MAX_PAGE_SIZE)
+    users = await cursor.limit(limit).to_list(length=limit)
+    next_cursor = users[-1]["_id"] if len(users) == limit else None
+    return MongoJSONResponse({"data": users, "next_cursor": next_cursor})
@@ -1,9 +1,23 @@
+from typing import List, Optional, Tuple
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel
+
 from app.core.security import get_current_user
+from app.core.responses import MongoJSONResponse
 from app.db.mongodb import mongodb
+from app.services.features import feature_scorer
 
 router = APIRouter()
 
+
+class UserUpdate(BaseModel):
+    age: Optional[int] = None
+    gender: Optional[str] = None
+    race: Optional[str] = None
+    hometown: Optional[str] = None
+    questions: List[Tuple[str, str]] = []
+
 @router.get("/me")
 async def get_current_user_profile(current_user: dict = Depends(get_current_user)):
     user = await mongodb.db.users.find_one({"email": current_user["email"]})
@@ -12,4 +26,48 @@ async def get_current_user_profile(current_user: dict = Depends(get_current_user
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    return user 
\ No newline at end of file
+    return MongoJSONResponse(user)
+
+@router.get("/{email}")
+async def get_user(email: str):
+    user = await mongodb.db.users.find_one({"email": email})
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    user["id"] = user.pop("_id")
+    return MongoJSONResponse({"data": user})
+
+@router.put("/{email}")
+async def update_user(email: str, request: UserUpdate):
+    """Store onboarding answers and the feature scores extracted from them"""
+    # Skip empty answers; refined scores are requested once the local ones are stored
+    answered = [(question, answer) for question, answer in request.questions if answer]
+    scores = await feature_scorer.score_async(answered, refine=False)
+
+    result = await mongodb.db.users.update_one(
+        {"email": email},
+        {"$set": {
+            "age": request.age,
+            "gender": request.gender,
+            "race": request.race,
+            "hometown": request.hometown,
+            **scores,
+            "is_onboarded": True
+        }}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    async def save_refined_scores(refined):
+        await mongodb.db.users.update_one({"email": email}, {"$set": refined})
+
+    feature_scorer.refine_async(answered, save_refined_scores)
+
+    user = await mongodb.db.users.find_one({"email": email})
+    user["id"] = user.pop("_id")
+    return MongoJSONResponse({"data": user})
@@ -11,11 +11,33 @@ class Settings(BaseSettings):
     
     # MongoDB
     MONGO_URL: str = os.getenv("MONGO_URL")
+    MONGO_DB_NAME: str = os.getenv("MONGO_DB_NAME", "NightSpot")
+    MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", 50))
     
     # Auth0
     AUTH0_DOMAIN: str = os.getenv("AUTH0_DOMAIN")
     AUTH0_API_AUDIENCE: str = os.getenv("AUTH0_API_AUDIENCE")
     AUTH0_ALGORITHMS: List[str] = ["RS256"]
+    JWKS_MIN_REFETCH_INTERVAL: float = float(os.getenv("JWKS_MIN_REFETCH_INTERVAL", 30))
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+    TOKEN_CACHE_SKEW: float = float(os.getenv("TOKEN_CACHE_SKEW", 30))
+
+    # Identity-provider metadata, loaded in the background and snapshotted to disk
+    PROVIDER_METADATA_SNAPSHOT: str = os.getenv("PROVIDER_METADATA_SNAPSHOT", ".provider_metadata.json")
+    PROVIDER_METADATA_REFRESH: float = float(os.getenv("PROVIDER_METADATA_REFRESH", 3600))
+    
+    # Run the matching rounds, email senders and expiry sweeper in this process
+    BACKGROUND_WORKERS: bool = os.getenv("BACKGROUND_WORKERS", "true").lower() == "true"
+
+    # Queue API: page size of GET /queue, and the most a client may ask for
+    QUEUE_PAGE_SIZE: int = int(os.getenv("QUEUE_PAGE_SIZE", 100))
+    QUEUE_MAX_PAGE_SIZE: int = int(os.getenv("QUEUE_MAX_PAGE_SIZE", 1000))
+
+    # Feature extraction, configured as in the Flask app
+    FEATURE_SCORER: str = os.getenv("FEATURE_SCORER", "remote")
+    FEATURE_EXTRACTION_BATCH: bool = os.getenv("FEATURE_EXTRACTION_BATCH", "true").lower() == "true"
+    FEATURE_CACHE_SIZE: int = int(os.getenv("FEATURE_CACHE_SIZE", 10000))
+    FEATURE_CACHE_TTL: float = float(os.getenv("FEATURE_CACHE_TTL", 3600))
     
     # Google OAuth
     GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID")
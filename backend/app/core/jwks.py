@@ -0,0 +1,60 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.provider_metadata import provider_metadata
+
+
+class JWKSCache:
+    """
+    Process-wide store of the Auth0 signing keys.
+
+    The keys come from the provider metadata store, which loads them in the
+    background and keeps them fresh, so verifying a token is a dictionary
+    lookup. A token with an unknown `kid` triggers one refetch, but
+    refetches are rate limited to one per `min_refetch_interval` seconds so
+    bogus tokens cannot hammer Auth0.
+    """
+
+    def __init__(self, source: str = "auth0_jwks", min_refetch_interval: float = 30):
+        self.source = source
+        self.min_refetch_interval = min_refetch_interval
+        self.keys: Dict[str, dict] = {}
+        self._last_attempt = 0.0
+        self._lock = asyncio.Lock()
+        provider_metadata.on_update(source, self._load)
+
+    def _load(self, jwks: dict):
+        self.keys = {
+            key["kid"]: {
+                "kty": key["kty"],
+                "kid": key["kid"],
+                "use": key["use"],
+                "n": key["n"],
+                "e": key["e"]
+            }
+            for key in jwks["keys"]
+        }
+
+    async def refresh(self):
+        """Refetch the keys unless another caller just did."""
+        async with self._lock:
+            if time.monotonic() - self._last_attempt < self.min_refetch_interval:
+                return
+            self._last_attempt = time.monotonic()
+            await provider_metadata.refresh(self.source)
+
+    async def get_key(self, kid: str) -> Optional[dict]:
+        """The signing key for `kid`, refetching once if it is unknown."""
+        key = self.keys.get(kid)
+        if key is not None:
+            return key
+        try:
+            await self.refresh()
+        except Exception as e:
+            print(f"Error fetching JWKS: {str(e)}")
+        return self.keys.get(kid)
+
+
+jwks_cache = JWKSCache(min_refetch_interval=settings.JWKS_MIN_REFETCH_INTERVAL)
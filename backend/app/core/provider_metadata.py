@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+
+
+class ProviderMetadata:
+    """
+    Identity-provider documents (OpenID configuration, signing keys) that
+    auth depends on, loaded off the startup path.
+
+    start() first serves whatever the last run saved to `snapshot_path`,
+    then fetches every source in a background task, retrying failures every
+    `retry_interval` seconds and refreshing successes every
+    `refresh_interval` seconds. Each fetched document is written back to the
+    snapshot. Listeners registered with on_update() are called whenever a
+    document is loaded, from the snapshot or from the network.
+    """
+
+    def __init__(self, sources: Dict[str, str], snapshot_path: str,
+                 refresh_interval: float = 3600, retry_interval: float = 30):
+        self.sources = sources
+        self.snapshot_path = snapshot_path
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.documents: Dict[str, dict] = {}
+        self.origins: Dict[str, str] = {}
+        self.fetched_at: Dict[str, float] = {}
+        self._listeners: Dict[str, List[Callable[[dict], None]]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def on_update(self, name: str, callback: Callable[[dict], None]):
+        """Call `callback(document)` now if `name` is loaded, and on every update."""
+        self._listeners.setdefault(name, []).append(callback)
+        if name in self.documents:
+            callback(self.documents[name])
+
+    def get(self, name: str) -> Optional[dict]:
+        return self.documents.get(name)
+
+    def _set(self, name: str, document: dict, origin: str, fetched_at: float):
+        self.documents[name] = document
+        self.origins[name] = origin
+        self.fetched_at[name] = fetched_at
+        for callback in self._listeners.get(name, []):
+            try:
+                callback(document)
+            except Exception as e:
+                print(f"Error applying provider metadata {name}: {str(e)}")
+
+    def load_snapshot(self):
+        """Load the documents saved by a previous run, if any."""
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Error reading provider metadata snapshot: {str(e)}")
+            return
+        for name, entry in snapshot.items():
+            if name in self.sources and name not in self.documents:
+                self._set(name, entry["document"], "snapshot", entry["fetched_at"])
+
+    def _save_snapshot(self):
+        snapshot = {
+            name: {"document": document, "fetched_at": self.fetched_at[name]}
+            for name, document in self.documents.items()
+        }
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            print(f"Error writing provider metadata snapshot: {str(e)}")
+
+    async def refresh(self, name: str) -> dict:
+        """Fetch one source now, store it and return it."""
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.get(self.sources[name])
+            response.raise_for_status()
+            document = response.json()
+        self._set(name, document, "network", time.time())
+        self._save_snapshot()
+        return document
+
+    async def _load_forever(self):
+        while True:
+            results = await asyncio.gather(
+                *(self.refresh(name) for name in self.sources),
+                return_exceptions=True
+            )
+            failed = False
+            for name, result in zip(self.sources, results):
+                if isinstance(result, Exception):
+                    failed = True
+                    print(f"Error fetching provider metadata {name}: {str(result)}")
+            await asyncio.sleep(self.retry_interval if failed else self.refresh_interval)
+
+    def start(self):
+        """Serve the snapshot and start loading fresh documents in the background."""
+        self.load_snapshot()
+        if self._task is None:
+            self._task = asyncio.create_task(self._load_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def readiness(self) -> dict:
+        """Whether every source is loaded, and where each one came from."""
+        now = time.time()
+        return {
+            "ready": all(name in self.documents for name in self.sources),
+            "sources": {
+                name: {
+                    "loaded": name in self.documents,
+                    "origin": self.origins.get(name),
+                    "age_seconds": round(now - self.fetched_at[name], 1) if name in self.fetched_at else None
+                }
+                for name in self.sources
+            }
+        }
+
+
+provider_metadata = ProviderMetadata(
+    {
+        "auth0_jwks": f"https://{settings.AUTH0_DOMAIN}/.well-known/jwks.json",
+        "google_openid": "https://accounts.google.com/.well-known/openid-configuration",
+        "google_jwks": "https://www.googleapis.com/oauth2/v3/certs"
+    },
+    settings.PROVIDER_METADATA_SNAPSHOT,
+    refresh_interval=settings.PROVIDER_METADATA_REFRESH
+)
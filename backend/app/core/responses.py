@@ -0,0 +1,11 @@
+from fastapi.responses import JSONResponse
+
+from json_provider import dumpb
+
+
+class MongoJSONResponse(JSONResponse):
+    """JSON response that encodes ObjectId and datetime like the Flask app does"""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumpb(content)
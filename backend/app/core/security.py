@@ -1,36 +1,29 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2AuthorizationCodeBearer
 from jose import JWTError, jwt
-import requests
 from app.core.config import settings
+from app.core.jwks import jwks_cache
+from app.core.token_cache import token_cache
 
 oauth2_scheme = OAuth2AuthorizationCodeBearer(
     authorizationUrl=f"https://{settings.AUTH0_DOMAIN}/authorize",
     tokenUrl=f"https://{settings.AUTH0_DOMAIN}/oauth/token"
 )
 
-async def get_auth0_jwks():
-    """Fetch JWKS from Auth0"""
-    jwks_url = f"https://{settings.AUTH0_DOMAIN}/.well-known/jwks.json"
-    response = requests.get(jwks_url)
-    return response.json()
-
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    if token_cache.is_revoked(token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+    issuer = f"https://{settings.AUTH0_DOMAIN}/"
+    cached = token_cache.get(token, settings.AUTH0_API_AUDIENCE, issuer)
+    if cached is not None:
+        return cached
+
     try:
-        jwks = await get_auth0_jwks()
         unverified_header = jwt.get_unverified_header(token)
-        rsa_key = {}
-        
-        for key in jwks["keys"]:
-            if key["kid"] == unverified_header["kid"]:
-                rsa_key = {
-                    "kty": key["kty"],
-                    "kid": key["kid"],
-                    "use": key["use"],
-                    "n": key["n"],
-                    "e": key["e"]
-                }
-                break
+        rsa_key = await jwks_cache.get_key(unverified_header.get("kid"))
         
         if not rsa_key:
             raise HTTPException(
@@ -43,9 +36,10 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
             rsa_key,
             algorithms=settings.AUTH0_ALGORITHMS,
             audience=settings.AUTH0_API_AUDIENCE,
-            issuer=f"https://{settings.AUTH0_DOMAIN}/"
+            issuer=issuer
         )
         
+        token_cache.put(token, payload, settings.AUTH0_API_AUDIENCE, issuer)
         return payload
         
     except JWTError:
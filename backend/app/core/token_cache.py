@@ -0,0 +1,109 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified token payloads, keyed by a SHA-256 digest
+    of the raw token so tokens themselves are never kept in memory.
+
+    Verifiers check different audiences and issuers, so each entry is also
+    keyed by the `audience` and `issuer` the token was verified against; a
+    token accepted by one verifier is never served to another. Revocation
+    applies to the token whichever verifier accepted it.
+
+    A payload is served until `skew` seconds before its `exp`, so a server
+    clock running slightly behind the issuer's never accepts an expired
+    token. Revoked tokens are remembered until they expire and are rejected
+    even if they verify.
+    """
+
+    def __init__(self, max_size: int = 10000, skew: float = 30):
+        self.max_size = max_size
+        self.skew = skew
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._revoked = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @classmethod
+    def _key(cls, token: str, audience: Optional[str], issuer: Optional[str]) -> tuple:
+        return (audience, issuer, cls.digest(token))
+
+    def get(self, token: str, audience: Optional[str] = None, issuer: Optional[str] = None) -> Optional[dict]:
+        """The payload cached for `token` by the verifier of `audience` and `issuer`, or None."""
+        key = self._key(token, audience, issuer)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, payload = entry
+            if expires <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, token: str, payload: dict, audience: Optional[str] = None, issuer: Optional[str] = None):
+        """Remember a payload that has just been verified against `audience` and `issuer`."""
+        exp = payload.get("exp")
+        if exp is None:
+            return
+        now = time.time()
+        expires = float(exp) - self.skew
+        nbf = payload.get("nbf")
+        if expires <= now or (nbf is not None and float(nbf) > now + self.skew):
+            return
+        key = self._key(token, audience, issuer)
+        with self._lock:
+            if key[2] in self._revoked:
+                return
+            self._entries[key] = (expires, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def revoke(self, token: str, exp: Optional[float] = None):
+        """Drop `token` from the cache and reject it until it expires."""
+        digest = self.digest(token)
+        now = time.time()
+        with self._lock:
+            entries = [self._entries.pop(key) for key in list(self._entries) if key[2] == digest]
+            if exp is None:
+                exp = max(entry[0] for entry in entries) + self.skew if entries else now + 86400
+            self._revoked[digest] = float(exp)
+            self._revoked = {k: e for k, e in self._revoked.items() if e > now}
+
+    def is_revoked(self, token: str) -> bool:
+        with self._lock:
+            exp = self._revoked.get(self.digest(token))
+        return exp is not None and exp > time.time()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "revoked": len(self._revoked),
+                "verifications_saved": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+token_cache = TokenCache(max_size=settings.TOKEN_CACHE_SIZE, skew=settings.TOKEN_CACHE_SKEW)
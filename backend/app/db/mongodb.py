@@ -8,8 +8,8 @@ class MongoDB:
 mongodb = MongoDB()
 
 async def connect_to_mongo():
-    mongodb.client = AsyncIOMotorClient(settings.MONGO_URL)
-    mongodb.db = mongodb.client.wildhacks2025
+    mongodb.client = AsyncIOMotorClient(settings.MONGO_URL, maxPoolSize=settings.MONGO_MAX_POOL_SIZE)
+    mongodb.db = mongodb.client[settings.MONGO_DB_NAME]
 
 async def close_mongo_connection():
     mongodb.client.close() 
\ No newline at end of file
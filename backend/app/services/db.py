@@ -1,11 +1,11 @@
 from flask import current_app
-from pymongo import MongoClient
 from werkzeug.local import LocalProxy
+import mongo
 
 def get_db():
     if 'db' not in current_app.extensions:
-        client = MongoClient(current_app.config['MONGO_URI'])
-        current_app.extensions['db'] = client['wildhacks2025']  # Specify database name
+        # Share the process-wide client instead of opening a second pool
+        current_app.extensions['db'] = mongo.db
     return current_app.extensions['db']
 
 db = LocalProxy(get_db)
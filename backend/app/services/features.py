@@ -0,0 +1,19 @@
+import mongo
+from app.core.config import settings
+from feature_cache import FeatureCache
+from feature_extraction import PROMPT_VERSION
+from scorers import FeatureScorer, GeminiScorer, LocalScorer
+
+# Shares the feature_cache collection, and so cached scores, with the Flask app
+feature_cache = FeatureCache(
+    mongo.collection('feature_cache'),
+    prompt_version=PROMPT_VERSION,
+    max_size=settings.FEATURE_CACHE_SIZE,
+    ttl=settings.FEATURE_CACHE_TTL
+)
+
+feature_scorer = FeatureScorer(
+    GeminiScorer(batch=settings.FEATURE_EXTRACTION_BATCH, cache=feature_cache),
+    LocalScorer(),
+    policy=settings.FEATURE_SCORER
+)
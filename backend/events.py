@@ -0,0 +1,115 @@
+"""
+Compact event documents and the tools to read and migrate them.
+
+An event stores references only: its members as {"id", "email"} (the
+waiting entry id and the user's email) and its venue as location_id.
+Readers call hydrate_events to get the full shape back, with "users" and
+"location", using one $in query per collection for any number of events.
+
+    python events.py migrate [batch_size]   # rewrite old embedded events
+"""
+import sys
+
+from pymongo import UpdateOne
+
+import mongo
+from venues import DEFAULT_LOCATION
+
+# Fields of a user document copied into a hydrated event.
+MEMBER_FIELDS = {"_id": 0, "email": 1, "name": 1, "picture": 1}
+
+
+def compact_event(event_id, group, meeting_time, location):
+    """The document stored for a group matched into `location`."""
+    return {
+        "event_id": event_id,
+        "members": [{"id": user['id'], "email": user['email']} for user in group],
+        "meeting_time": meeting_time,
+        "location_id": location.get("_id"),
+    }
+
+
+def hydrate_events(events, users_collection, locations_collection):
+    """
+    Replace member and location references with the documents they point
+    to. Events still in the old embedded shape are returned unchanged.
+    """
+    events = list(events)
+    compact = [event for event in events if "members" in event]
+    emails = {member['email'] for event in compact for member in event['members']}
+    location_ids = {event['location_id'] for event in compact if event.get('location_id') is not None}
+
+    users = {}
+    if emails:
+        for user in users_collection.find({"email": {"$in": list(emails)}}, MEMBER_FIELDS):
+            users[user['email']] = user
+    locations = {}
+    if location_ids:
+        for location in locations_collection.find({"_id": {"$in": list(location_ids)}}):
+            locations[location['_id']] = location
+
+    for event in compact:
+        event['users'] = [
+            {"name": member['email'].split("@")[0], **users.get(member['email'], {}), **member}
+            for member in event.pop('members')
+        ]
+        event['location'] = locations.get(event.pop('location_id'), DEFAULT_LOCATION)
+    return events
+
+
+def hydrate_event(event, users_collection, locations_collection):
+    return hydrate_events([event], users_collection, locations_collection)[0]
+
+
+def migrate_events(events_collection, batch_size=500):
+    """
+    Rewrite events that embed whole user and location documents into the
+    compact shape, `batch_size` at a time. Safe to re-run; returns the
+    number of events rewritten.
+    """
+    migrated = 0
+    last_id = None
+    while True:
+        query = {"users": {"$exists": True}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(
+            events_collection.find(query, {"users.id": 1, "users.email": 1, "location._id": 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+        )
+        if not batch:
+            return migrated
+
+        updates = [
+            UpdateOne(
+                {"_id": event['_id']},
+                {
+                    "$set": {
+                        "members": [{"id": user.get('id'), "email": user['email']} for user in event['users']],
+                        "location_id": (event.get('location') or {}).get('_id'),
+                    },
+                    "$unset": {"users": "", "location": ""},
+                }
+            )
+            for event in batch
+        ]
+        migrated += events_collection.bulk_write(updates, ordered=False).modified_count
+        last_id = batch[-1]['_id']
+        print(f"Migrated {migrated} events")
+
+
+def main():
+    db = mongo.get_db()
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == "migrate":
+        batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+        migrated = migrate_events(db.events, batch_size)
+        print(f"Done: {migrated} events rewritten")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
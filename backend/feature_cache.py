@@ -0,0 +1,111 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+
+def _normalize(text):
+    return " ".join(str(text).lower().split())
+
+
+class FeatureCache:
+    """
+    Two-tier cache of extracted feature scores.
+
+    Entries are keyed on a hash of the normalized question, the normalized
+    answer and the prompt version, so a prompt change invalidates every
+    entry. The first tier is an in-process LRU bounded by `max_size` entries
+    and `ttl` seconds; the second is a Mongo collection shared by all
+    workers, whose entries expire after `persistent_ttl` seconds through a
+    TTL index on `expires_at` (see indexes.py).
+    """
+
+    def __init__(self, collection=None, prompt_version="", max_size=10000, ttl=3600, persistent_ttl=30 * 86400):
+        self.collection = collection
+        self.prompt_version = prompt_version
+        self.max_size = max_size
+        self.ttl = ttl
+        self.persistent_ttl = persistent_ttl
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, question, answer):
+        raw = json.dumps([_normalize(question), _normalize(answer), self.prompt_version])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _remember(self, key, scores):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, scores)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, question, answer):
+        """Cached scores for this answer, or None."""
+        key = self.key(question, answer)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, scores = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return scores
+                del self._entries[key]
+
+        if self.collection is not None:
+            try:
+                doc = self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+            except Exception as e:
+                print(f"Error reading feature cache: {str(e)}")
+                doc = None
+            if doc is not None:
+                self._remember(key, doc['scores'])
+                with self._lock:
+                    self.persistent_hits += 1
+                return doc['scores']
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, question, answer, scores):
+        key = self.key(question, answer)
+        self._remember(key, scores)
+        if self.collection is not None:
+            try:
+                self.collection.replace_one(
+                    {"_id": key},
+                    {
+                        "scores": scores,
+                        "prompt_version": self.prompt_version,
+                        "expires_at": datetime.utcnow() + timedelta(seconds=self.persistent_ttl)
+                    },
+                    upsert=True
+                )
+            except Exception as e:
+                print(f"Error writing feature cache: {str(e)}")
+
+    def clear(self):
+        """Drop the in-process tier and every persisted entry."""
+        with self._lock:
+            self._entries.clear()
+        if self.collection is not None:
+            self.collection.delete_many({})
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.persistent_hits + self.misses
+            return {
+                "prompt_version": self.prompt_version,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.persistent_hits) / lookups, 3) if lookups else 0.0
+            }
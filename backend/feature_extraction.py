@@ -0,0 +1,305 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from dotenv import load_dotenv
+from google import genai
+
+from features import FEATURES
+
+load_dotenv()
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# At most FEATURE_EXTRACTION_CONCURRENCY Gemini calls run at once per process.
+# Each call gives up after FEATURE_CALL_TIMEOUT seconds, and a questionnaire
+# stops waiting for stragglers after FEATURE_TOTAL_TIMEOUT seconds.
+FEATURE_EXTRACTION_CONCURRENCY = int(os.getenv("FEATURE_EXTRACTION_CONCURRENCY", 4))
+FEATURE_CALL_TIMEOUT = float(os.getenv("FEATURE_CALL_TIMEOUT", 10))
+FEATURE_TOTAL_TIMEOUT = float(os.getenv("FEATURE_TOTAL_TIMEOUT", 20))
+
+_client = None
+_client_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=FEATURE_EXTRACTION_CONCURRENCY, thread_name_prefix="gemini")
+# The same limit for asyncio callers, one semaphore per event loop
+_async_limits = {}
+
+SYSTEM_PROMPT = """You are a specialist in the human psyche and you can determine someone personality from short responses.
+    The way you evaluate the change is writing a report scoring from 0 to 5 the response in four categories: extroversion, openness, spontaneity and energy_level.
+    0 means the absolute lowest level of the category possible. A 0 extroversion person absolutely despises being with other people.
+    5 means the absolute peak of the category. A 5 openness person would be open to essentially anything.
+    Don't be afraid of giving scores that end with values other than .5 and .0
+"""
+
+SINGLE_PROMPT = SYSTEM_PROMPT + """    You should only output the name of the category, a colon, a space, and the score. 
+
+    The formatting of the response should be the following (example with dummy values):
+    extroversion: 2.2
+    openness: 4.6
+    spontaneity: 0.0
+    energy_level: 5.0
+
+    A client of yours was tasked to respond to the following question:
+    {question}
+
+    And they gave the following answer:
+    {answer}
+
+    Give your response in the specified format. 
+    """
+
+BATCH_PROMPT = SYSTEM_PROMPT + """
+    A client of yours was tasked to respond to the following {count} numbered questions, and gave these answers:
+{answers}
+
+    Score each answer on its own. Respond with only a JSON array holding exactly {count} objects, one per answer
+    in the same order, each with the keys {keys}. Example with dummy values for a single answer:
+    {example}
+    """
+
+# Changes whenever the model or a prompt changes, so cached scores from an
+# older prompt are never reused.
+PROMPT_VERSION = hashlib.sha256((GEMINI_MODEL + SINGLE_PROMPT + BATCH_PROMPT).encode()).hexdigest()[:16]
+
+
+def get_client():
+    """The Gemini client shared by every call in this process."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = genai.Client(
+                api_key=GEMINI_API_KEY,
+                http_options={"timeout": int(FEATURE_CALL_TIMEOUT * 1000)}
+            )
+        return _client
+
+
+def extract_features(question, answer):
+    client = get_client()
+    prompt_text = SINGLE_PROMPT.format(question=question, answer=answer)
+
+    return client.models.generate_content(
+    model=GEMINI_MODEL, contents=prompt_text
+    ).text
+
+
+def parse_feature_scores(response):
+    """
+    Parse a "category: score" reply from extract_features into a dict.
+    Scores that are not numbers count as 0.
+    """
+    feature_scores = {}
+    for line in response.strip().splitlines():
+        if ':' in line:
+            category, value = line.split(':', 1)
+            try:
+                feature_scores[category.strip()] = float(value.strip())
+            except ValueError:
+                feature_scores[category.strip()] = 0.0
+    return feature_scores
+
+
+def _batch_prompt(pairs):
+    answers = "\n".join(
+        f"""    {number}. Question: {json.dumps(question)}
+       Answer: {json.dumps(answer)}"""
+        for number, (question, answer) in enumerate(pairs, 1)
+    )
+    return BATCH_PROMPT.format(
+        count=len(pairs),
+        answers=answers,
+        keys=", ".join(FEATURES),
+        example=json.dumps([{"extroversion": 2.2, "openness": 4.6, "spontaneity": 0.0, "energy_level": 5.0}])
+    )
+
+
+def _parse_batch_scores(text, count):
+    scores = json.loads(text)
+    if not isinstance(scores, list) or len(scores) != count:
+        raise ValueError(f"Expected {count} score objects, got: {text[:200]}")
+
+    results = []
+    for item in scores:
+        feature_scores = {}
+        for feature in FEATURES:
+            try:
+                feature_scores[feature] = float(item.get(feature, 0.0))
+            except (TypeError, ValueError):
+                feature_scores[feature] = 0.0
+        results.append(feature_scores)
+    return results
+
+
+def extract_features_batch(pairs):
+    """
+    Score every (question, answer) pair with a single Gemini request.
+
+    The model is asked for a JSON array with one object of scores per pair,
+    in the same order. Returns a list of score dicts, one per pair.
+    """
+    response = get_client().models.generate_content(
+        model=GEMINI_MODEL,
+        contents=_batch_prompt(pairs),
+        config={"response_mime_type": "application/json"}
+    )
+    return _parse_batch_scores(response.text, len(pairs))
+
+
+def extract_features_concurrent(pairs, total_timeout=FEATURE_TOTAL_TIMEOUT):
+    """
+    Score every (question, answer) pair with its own Gemini call, running
+    the calls in parallel on the shared executor.
+
+    Returns the score dicts in the order of `pairs`, with None for answers
+    whose call failed or had not finished within `total_timeout` seconds.
+    """
+    futures = [_executor.submit(extract_features, question, answer) for question, answer in pairs]
+    done, pending = wait(futures, timeout=total_timeout)
+    for future in pending:
+        future.cancel()
+    if pending:
+        print(f"Feature extraction: {len(pending)} of {len(pairs)} answers timed out")
+
+    results = []
+    for future in futures:
+        scores = None
+        if future in done:
+            try:
+                scores = parse_feature_scores(future.result())
+            except Exception as e:
+                print(f"Error extracting features: {str(e)}")
+        results.append(scores)
+    return results
+
+
+def average_features(score_dicts):
+    """
+    Average per-answer scores into one score per feature. Missing scores
+    count as 0, and no answers at all give 0 for every feature.
+    """
+    count = len(score_dicts)
+    if count == 0:
+        return {feature: 0.0 for feature in FEATURES}
+    return {
+        feature: sum(scores.get(feature, 0.0) for scores in score_dicts) / count
+        for feature in FEATURES
+    }
+
+
+def score_answers(pairs, batch=True, cache=None):
+    """
+    Score a questionnaire and average the results per feature.
+
+    Answers found in `cache` (a FeatureCache) are not sent to Gemini. With
+    batch=True the rest go to Gemini in one request; otherwise each is
+    scored with its own call, all of them running in parallel. Answers that
+    could not be scored are left out of the average.
+    """
+    if not pairs:
+        return average_features([])
+
+    scores = [cache.get(question, answer) if cache else None for question, answer in pairs]
+    missing = [index for index, found in enumerate(scores) if found is None]
+    if missing:
+        to_score = [pairs[index] for index in missing]
+        fresh = extract_features_batch(to_score) if batch else extract_features_concurrent(to_score)
+        for index, found in zip(missing, fresh):
+            if found is None:
+                continue
+            scores[index] = found
+            if cache:
+                cache.set(*pairs[index], found)
+
+    scored = [found for found in scores if found is not None]
+    if not scored:
+        raise TimeoutError("No answers could be scored")
+    return average_features(scored)
+
+
+def _async_limit():
+    """The semaphore holding async Gemini calls to FEATURE_EXTRACTION_CONCURRENCY on this loop."""
+    loop = asyncio.get_running_loop()
+    limit = _async_limits.get(loop)
+    if limit is None:
+        for other in [other for other in _async_limits if other.is_closed()]:
+            del _async_limits[other]
+        limit = _async_limits[loop] = asyncio.Semaphore(FEATURE_EXTRACTION_CONCURRENCY)
+    return limit
+
+
+async def extract_features_async(question, answer):
+    """extract_features, on the client's asyncio transport."""
+    async with _async_limit():
+        response = await get_client().aio.models.generate_content(
+            model=GEMINI_MODEL, contents=SINGLE_PROMPT.format(question=question, answer=answer)
+        )
+    return response.text
+
+
+async def extract_features_batch_async(pairs):
+    """extract_features_batch, on the client's asyncio transport."""
+    async with _async_limit():
+        response = await get_client().aio.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=_batch_prompt(pairs),
+            config={"response_mime_type": "application/json"}
+        )
+    return _parse_batch_scores(response.text, len(pairs))
+
+
+async def extract_features_concurrent_async(pairs, total_timeout=FEATURE_TOTAL_TIMEOUT):
+    """
+    extract_features_concurrent for asyncio callers: one call per pair, at
+    most FEATURE_EXTRACTION_CONCURRENCY at a time, all awaited together,
+    with None for answers that failed or timed out.
+    """
+    tasks = [asyncio.ensure_future(extract_features_async(question, answer)) for question, answer in pairs]
+    done, pending = await asyncio.wait(tasks, timeout=total_timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        print(f"Feature extraction: {len(pending)} of {len(pairs)} answers timed out")
+
+    results = []
+    for task in tasks:
+        scores = None
+        if task in done:
+            try:
+                scores = parse_feature_scores(task.result())
+            except Exception as e:
+                print(f"Error extracting features: {str(e)}")
+        results.append(scores)
+    return results
+
+
+async def score_answers_async(pairs, batch=True, cache=None):
+    """
+    score_answers for asyncio callers. Gemini is called without blocking
+    the event loop; cache lookups, which may read Mongo, run in a thread.
+    """
+    if not pairs:
+        return average_features([])
+
+    scores = [await asyncio.to_thread(cache.get, question, answer) if cache else None for question, answer in pairs]
+    missing = [index for index, found in enumerate(scores) if found is None]
+    if missing:
+        to_score = [pairs[index] for index in missing]
+        if batch:
+            fresh = await asyncio.wait_for(extract_features_batch_async(to_score), FEATURE_TOTAL_TIMEOUT)
+        else:
+            fresh = await extract_features_concurrent_async(to_score)
+        for index, found in zip(missing, fresh):
+            if found is None:
+                continue
+            scores[index] = found
+            if cache:
+                await asyncio.to_thread(cache.set, *pairs[index], found)
+
+    scored = [found for found in scores if found is not None]
+    if not scored:
+        raise TimeoutError("No answers could be scored")
+    return average_features(scored)
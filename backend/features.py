@@ -0,0 +1,17 @@
+import numpy as np
+
+# Personality features stored on every waiting user and compared by the matcher.
+# Everything that reads or writes these scores should use this list.
+FEATURES = ["extroversion", "openness", "spontaneity", "energy_level"]
+
+
+def feature_matrix(users, features=FEATURES):
+    """
+    Load the feature scores of `users` into one contiguous N x len(features)
+    float array. Missing scores are read as 0.
+    """
+    matrix = np.zeros((len(users), len(features)), dtype=np.float64)
+    for row, user in enumerate(users):
+        for col, feature in enumerate(features):
+            matrix[row, col] = user.get(feature) or 0.0
+    return matrix
@@ -0,0 +1,138 @@
+"""
+Index bootstrap and query-plan checks for the NightSpot database.
+
+    python indexes.py apply     # create the declared indexes
+    python indexes.py explain   # print the plan of every query the app issues
+"""
+import sys
+
+from pymongo import ASCENDING
+from pymongo.errors import ConnectionFailure
+
+import mongo
+
+# Indexes every collection needs, as (collection, keys, options).
+INDEXES = [
+    ("users", [("email", ASCENDING)], {"unique": True}),
+    ("waiting_users", [("meeting_time", ASCENDING), ("_id", ASCENDING)], {}),
+    ("waiting_users", [("id", ASCENDING)], {"unique": True}),
+    ("waiting_users", [("claim", ASCENDING)], {"sparse": True}),
+    # The sweeper archives expired entries; the TTL only catches what it misses
+    ("waiting_users", [("expires_at", ASCENDING)], {"expireAfterSeconds": 86400}),
+    ("waiting_users_archive", [("id", ASCENDING)], {}),
+    ("events", [("event_id", ASCENDING)], {"unique": True}),
+    ("events", [("meeting_time", ASCENDING)], {}),
+    ("events", [("email_status", ASCENDING)], {}),
+    ("events", [("members.id", ASCENDING)], {}),
+    ("events", [("members.email", ASCENDING)], {}),
+    # Events still embedding whole users, until `python events.py migrate` has run
+    ("events", [("users.id", ASCENDING)], {"sparse": True}),
+    ("events", [("users.email", ASCENDING)], {"sparse": True}),
+    ("locations", [("name", ASCENDING)], {}),
+    ("venue_bookings", [("meeting_time", ASCENDING)], {}),
+    ("email_outbox", [("status", ASCENDING), ("next_attempt_at", ASCENDING)], {}),
+    ("email_outbox", [("event_id", ASCENDING)], {}),
+    ("feature_cache", [("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+]
+
+# Every query shape the app issues, as (collection, filter, sort).
+QUERIES = [
+    ("users", {"email": "someone@example.com"}, None),
+    ("waiting_users", {"meeting_time": "2025-04-05 20:00", "$or": [{"claim": None}, {"claimed_at": {"$lte": 0}}]}, None),
+    ("waiting_users", {"id": {"$in": ["a", "b"]}}, None),
+    ("waiting_users", {"claim": "a"}, None),
+    ("waiting_users", {"expires_at": {"$lte": 0}, "$or": [{"claim": None}, {"claimed_at": {"$lte": 0}}]}, None),
+    ("waiting_users", {"meeting_time": "2025-04-05 20:00", "_id": {"$gt": 0}}, [("_id", ASCENDING)]),
+    ("waiting_users_archive", {"id": "a"}, None),
+    ("events", {"event_id": "a"}, None),
+    ("events", {"email_status": "pending"}, None),
+    ("events", {"$or": [{"members.id": "a"}, {"users.id": "a"}]}, None),
+    ("events", {"$or": [{"members.email": "someone@example.com"}, {"users.email": "someone@example.com"}]}, [("_id", -1)]),
+    ("venue_bookings", {"meeting_time": "2025-04-05 20:00"}, None),
+    ("email_outbox", {"event_id": "a"}, None),
+    ("email_outbox", {"status": "pending", "next_attempt_at": {"$lte": 0}}, [("next_attempt_at", ASCENDING)]),
+    ("email_outbox", {"status": "sending", "locked_at": {"$lte": 0}}, [("next_attempt_at", ASCENDING)]),
+    ("feature_cache", {"_id": "a", "expires_at": {"$gt": 0}}, None),
+]
+
+
+def ensure_indexes(db):
+    """
+    Create every declared index. Existing identical indexes are left alone;
+    an index that cannot be built (e.g. duplicate emails) is reported and
+    skipped so the query-plan check can flag what it leaves uncovered.
+    Raises ConnectionFailure at once if the database cannot be reached.
+    """
+    for collection, keys, options in INDEXES:
+        try:
+            db[collection].create_index(keys, **options)
+        except ConnectionFailure:
+            raise
+        except Exception as e:
+            print(f"Error creating index {keys} on {collection}: {str(e)}")
+
+
+def _stages(plan):
+    """All stage names in an explain plan tree."""
+    if not isinstance(plan, dict):
+        return []
+    stages = [plan["stage"]] if "stage" in plan else []
+    for child in ("inputStage", "queryPlan", "outerStage", "innerStage"):
+        stages += _stages(plan.get(child))
+    for child in plan.get("inputStages", []):
+        stages += _stages(child)
+    return stages
+
+
+def explain_queries(db):
+    """
+    Explain every query in QUERIES. Returns one summary dict per query with
+    the stages of its winning plan and whether it scans the collection.
+    """
+    summaries = []
+    for collection, query, sort in QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        stages = _stages(plan)
+        summaries.append({
+            "collection": collection,
+            "query": query,
+            "sort": sort,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages
+        })
+    return summaries
+
+
+def check_query_plans(db, strict=False):
+    """
+    Warn about every known query that would scan its whole collection, or
+    refuse to start if `strict` is set.
+    """
+    scans = [summary for summary in explain_queries(db) if summary["collscan"]]
+    for summary in scans:
+        print(f"Warning: COLLSCAN for {summary['collection']} query {summary['query']}")
+    if scans and strict:
+        raise RuntimeError(f"{len(scans)} queries would use a collection scan")
+
+
+def main():
+    db = mongo.get_db()
+    command = sys.argv[1] if len(sys.argv) > 1 else "explain"
+    if command == "apply":
+        ensure_indexes(db)
+        print(f"Applied {len(INDEXES)} indexes")
+    elif command == "explain":
+        for summary in explain_queries(db):
+            sort = f" sort {summary['sort']}" if summary["sort"] else ""
+            flag = "COLLSCAN" if summary["collscan"] else "ok"
+            print(f"[{flag}] {summary['collection']} {summary['query']}{sort}: {' <- '.join(summary['stages'])}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
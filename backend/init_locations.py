@@ -1,14 +1,7 @@
-from pymongo import MongoClient
-from dotenv import load_dotenv
-import os
+import mongo
 
-# Load environment variables
-load_dotenv()
-
-# Connect to MongoDB
-client = MongoClient(os.getenv('MONGO_URL'))
-db = client.NightSpot  # Changed to match the database name in app.py
-locations_collection = db.locations
+# Connect to MongoDB through the shared connection layer
+locations_collection = mongo.collection('locations')
 
 # Sample locations in Evanston
 locations = [
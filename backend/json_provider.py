@@ -0,0 +1,46 @@
+import orjson
+from bson import ObjectId
+from flask.json.provider import JSONProvider
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj):
+    """Types orjson does not know natively."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumpb(obj):
+    """Encode a Mongo document (or anything holding them) as JSON bytes."""
+    return orjson.dumps(obj, default=_default, option=OPTIONS)
+
+
+class MongoJSONProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+
+    Mongo documents can be returned as they come off the cursor: ObjectId
+    is encoded as its hex string and datetime as ISO 8601, including inside
+    nested documents such as the user lists embedded in events.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return dumpb(obj).decode()
+
+    def dumpb(self, obj):
+        """Like dumps, but returns the encoded bytes."""
+        return dumpb(obj)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            self.dumpb(obj),
+            mimetype="application/json"
+        )
@@ -0,0 +1,82 @@
+import re
+
+from features import FEATURES
+
+# Scores start at the middle of the 0-5 scale and each lexicon word moves
+# them by its weight. Words are matched on their stem, so "party" also
+# matches "parties" and "partying".
+BASE_SCORE = 2.5
+
+LEXICON = {
+    "extroversion": {
+        "party": 1.5, "parti": 1.5, "friend": 1.0, "people": 0.8, "social": 1.2, "crowd": 1.0,
+        "talk": 0.8, "meet": 0.8, "group": 0.7, "outgo": 1.5, "club": 1.0, "love": 0.3,
+        "alone": -1.5, "quiet": -1.2, "shy": -1.5, "introvert": -2.0, "home": -0.8,
+        "myself": -0.7, "awkward": -1.0, "small": -0.3, "read": -0.5,
+    },
+    "openness": {
+        "new": 1.0, "try": 1.0, "anything": 1.2, "curious": 1.5, "explor": 1.5, "travel": 1.2,
+        "adventur": 1.5, "differ": 0.8, "art": 0.8, "cultur": 1.0, "learn": 1.0, "open": 1.2,
+        "same": -1.0, "usual": -1.0, "routin": -1.2, "familiar": -1.0, "tradition": -0.8,
+        "never": -0.5, "avoid": -1.0, "comfort": -0.5,
+    },
+    "spontaneity": {
+        "spontan": 2.0, "whatev": 1.0, "random": 1.2, "last": 0.5, "impuls": 1.5, "wing": 1.2,
+        "sometim": 0.3, "flow": 0.8, "surpris": 1.0, "whenev": 0.8, "yes": 0.5,
+        "plan": -1.5, "schedul": -1.5, "organ": -1.0, "advanc": -1.2, "prepar": -1.0,
+        "always": -0.5, "list": -0.8, "careful": -1.0,
+    },
+    "energy_level": {
+        "danc": 1.5, "energ": 1.5, "active": 1.2, "sport": 1.2, "run": 1.0, "late": 1.0,
+        "loud": 1.0, "excit": 1.2, "wild": 1.5, "hype": 1.5, "night": 0.8, "gym": 1.0,
+        "tired": -1.5, "chill": -1.0, "relax": -1.2, "calm": -1.2, "sleep": -1.5, "early": -0.8,
+        "lazy": -1.5, "slow": -1.0, "couch": -1.2,
+    },
+}
+
+NEGATIONS = {"not", "no", "never", "don't", "dont", "can't", "cant", "won't", "wont", "hate", "dislike"}
+
+_WORD = re.compile(r"[a-z']+")
+
+
+class LexiconScorer:
+    """
+    Local, deterministic personality scorer.
+
+    Scores each answer by matching its words against a small per-feature
+    lexicon. A negation flips the weight of the next word. No network, and
+    an answer is scored in microseconds, so it doubles as the offline and
+    fallback backend for the Gemini scorer.
+    """
+
+    name = "lexicon"
+
+    def __init__(self, lexicon=LEXICON):
+        self.lexicon = lexicon
+
+    def _weight(self, feature, word):
+        weights = self.lexicon[feature]
+        for end in range(len(word), 2, -1):
+            if word[:end] in weights:
+                return weights[word[:end]]
+        return 0.0
+
+    def score_answer(self, question, answer):
+        words = _WORD.findall(str(answer).lower())
+        scores = {}
+        for feature in FEATURES:
+            total = 0.0
+            negate = False
+            for word in words:
+                if word in NEGATIONS:
+                    negate = True
+                    continue
+                weight = self._weight(feature, word)
+                total += -weight if negate else weight
+                negate = False
+            scores[feature] = round(min(5.0, max(0.0, BASE_SCORE + total)), 2)
+        return scores
+
+    def score(self, pairs):
+        """Score every (question, answer) pair. Returns one dict per pair."""
+        return [self.score_answer(question, answer) for question, answer in pairs]
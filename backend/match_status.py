@@ -0,0 +1,70 @@
+import threading
+
+# Fields of an event document that only the email workers need.
+HIDDEN_EVENT_FIELDS = {"email_status": 0, "email_attempts": 0, "email_error": 0}
+
+
+class MatchStatus:
+    """
+    Answers "has this waiting entry been matched yet?" for one entry at a
+    time, so clients never need the whole queue.
+
+    A lookup is two indexed queries: the event containing the entry, then
+    the waiting entry itself. Long-polling callers block in wait() until
+    publish() is called for an event holding their entry, or the timeout
+    passes. Events formed in another process are not published here, so
+    callers should look the entry up again after every wait. `hydrate`, if
+    given, turns a stored event into the one returned to clients. Entries
+    found in `archive_collection` are reported as expired.
+    """
+
+    def __init__(self, waiting_collection, events_collection, hydrate=None, archive_collection=None):
+        self.waiting_collection = waiting_collection
+        self.events_collection = events_collection
+        self.hydrate = hydrate
+        self.archive_collection = archive_collection
+        self._waiters = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, entry_id):
+        """
+        Returns {"status": "matched", "event": ...}, {"status": "waiting"},
+        {"status": "expired"}, or None if the entry is unknown.
+        """
+        # Events stored before the compact shape list their members under "users"
+        event = self.events_collection.find_one(
+            {"$or": [{"members.id": entry_id}, {"users.id": entry_id}]}, HIDDEN_EVENT_FIELDS
+        )
+        if event:
+            return {"status": "matched", "event": self.hydrate(event) if self.hydrate else event}
+        if self.waiting_collection.find_one({"id": entry_id}, {"_id": 1}):
+            return {"status": "waiting"}
+        if self.archive_collection is not None and self.archive_collection.find_one({"id": entry_id}, {"_id": 1}):
+            return {"status": "expired"}
+        return None
+
+    def wait(self, entry_id, timeout):
+        """Block until an event holding `entry_id` is published or `timeout` seconds pass."""
+        with self._lock:
+            waiter = self._waiters.setdefault(entry_id, [threading.Event(), 0])
+            waiter[1] += 1
+        try:
+            return waiter[0].wait(timeout)
+        finally:
+            with self._lock:
+                waiter[1] -= 1
+                if waiter[1] == 0 and self._waiters.get(entry_id) is waiter:
+                    del self._waiters[entry_id]
+
+    def publish(self, event):
+        """Wake everyone waiting on a member of `event`."""
+        with self._lock:
+            waiters = [self._waiters.get(member['id']) for member in event['members']]
+        for waiter in waiters:
+            if waiter:
+                waiter[0].set()
+
+    def waiting(self):
+        """Number of entries with a caller currently blocked in wait()."""
+        with self._lock:
+            return len(self._waiters)
@@ -0,0 +1,184 @@
+import itertools
+
+import numpy as np
+
+from features import FEATURES, feature_matrix
+
+# Scores are given with one decimal, so ranges like 1.1 - 0.1 land on the
+# threshold up to float rounding. Both matchers treat those as within it.
+TOLERANCE = 1e-9
+
+# How many candidate groups the reference matcher checks per vectorized call.
+BATCH_SIZE = 4096
+
+
+def groups_within_threshold(matrix, groups, threshold):
+    """
+    Check many candidate groups in one call.
+
+    `groups` is a G x group_size array of row indices into `matrix`. Returns
+    a boolean array of length G that is True where every feature's range
+    within the group does not exceed the threshold.
+    """
+    members = matrix[groups]
+    spread = members.max(axis=1) - members.min(axis=1)
+    return (spread <= threshold + TOLERANCE).all(axis=1)
+
+
+def is_similar_group(group, threshold=2.5, features=FEATURES):
+    """
+    Check if a group of users is similar based on the shared features.
+
+    A group is considered similar if for each feature, the difference
+    between the maximum and minimum values does not exceed the threshold.
+    """
+    matrix = feature_matrix(group, features)
+    return bool(groups_within_threshold(matrix, np.arange(len(group))[None, :], threshold)[0])
+
+
+def _find_by_combinations(matrix, group_size, threshold, required=None):
+    """
+    Reference matcher: try every group of `group_size` rows.
+
+    This is O(n^group_size) and is only kept to check the sweep matcher.
+    Candidates are checked BATCH_SIZE at a time.
+    """
+    combos = itertools.combinations(range(len(matrix)), group_size)
+    if required is not None:
+        combos = (combo for combo in combos if required in combo)
+    while True:
+        batch = np.array(list(itertools.islice(combos, BATCH_SIZE)), dtype=np.intp)
+        if len(batch) == 0:
+            return None
+        hits = np.flatnonzero(groups_within_threshold(matrix, batch, threshold))
+        if len(hits):
+            return batch[hits[0]]
+
+
+def _sweep(matrix, rows, axis, group_size, threshold, required=None, rank=None):
+    """
+    Find `group_size` of `rows` that fit in a box of side `threshold` on
+    every axis from `axis` onwards. If `required` is given, only groups that
+    contain that row are returned. If `rank` is given, the lowest-ranked
+    rows of the box are preferred.
+
+    Rows are sorted on the current axis and the end of the threshold-wide
+    window starting at each row is found with one searchsorted call. Only
+    the widest window for each distinct end is searched on the next axis:
+    the others are subsets of it.
+    """
+    if len(rows) < group_size:
+        return None
+    if axis == matrix.shape[1]:
+        if rank is not None:
+            rows = rows[np.argsort(rank[rows], kind="stable")]
+        if required is None:
+            return rows[:group_size]
+        others = rows[rows != required][:group_size - 1]
+        return np.r_[required, others]
+
+    ordered = rows[np.argsort(matrix[rows, axis], kind="stable")]
+    values = matrix[ordered, axis]
+    ends = np.searchsorted(values, values + threshold + TOLERANCE, side="right")
+    candidates = np.flatnonzero(ends - np.arange(len(ordered)) >= group_size)
+    if required is not None:
+        # The window must start at or below the required row and reach it.
+        anchor = matrix[required, axis]
+        candidates = candidates[values[candidates] <= anchor]
+        candidates = candidates[values[candidates] + threshold + TOLERANCE >= anchor]
+    if len(candidates) == 0:
+        return None
+    widest = candidates[np.r_[True, ends[candidates][1:] != ends[candidates][:-1]]]
+    for start in widest:
+        found = _sweep(matrix, ordered[start:ends[start]], axis + 1, group_size, threshold, required, rank)
+        if found is not None:
+            return found
+    return None
+
+
+def find_group_indices(matrix, group_size=5, threshold=1.0, mode="sweep", required=None, rank=None):
+    """
+    Find `group_size` rows of a feature matrix that are similar enough.
+    Returns an array of row indices, or None.
+
+    If `required` is a row index, only groups containing that row count.
+    `rank` is an optional per-row priority used by the sweep to choose
+    between rows that fit in the same group.
+    """
+    if mode == "combinations":
+        return _find_by_combinations(matrix, group_size, threshold, required)
+    if mode != "sweep":
+        raise ValueError(f"Unknown matching mode: {mode}")
+    return _sweep(matrix, np.arange(len(matrix)), 0, group_size, threshold, required, rank)
+
+
+def _within(matrix, row, threshold):
+    """Boolean mask of the rows within the threshold of `row` on every feature."""
+    return (np.abs(matrix - matrix[row]) <= threshold + TOLERANCE).all(axis=1)
+
+
+def neighbour_counts(matrix, threshold=1.0):
+    """
+    For every row, count the other rows within the threshold of it on every
+    feature. Rows are compared in chunks to bound memory.
+    """
+    counts = np.zeros(len(matrix), dtype=np.intp)
+    chunk = max(1, 2 ** 22 // max(len(matrix), 1))
+    for start in range(0, len(matrix), chunk):
+        block = matrix[start:start + chunk, None, :]
+        close = (np.abs(block - matrix[None, :, :]) <= threshold + TOLERANCE).all(axis=2)
+        counts[start:start + chunk] = close.sum(axis=1) - 1
+    return counts
+
+
+def partition_groups(matrix, group_size=5, threshold=1.0):
+    """
+    Split a whole meeting-time pool into as many disjoint similar groups as
+    possible. Returns a list of row index arrays.
+
+    Finding the true maximum is a hard packing problem, so this places the
+    most constrained rows first: rows are visited by how few neighbours they
+    have, and each one is grouped with its least-connected neighbours. Rows
+    with many options are left for later, where first-fit would use them up.
+    """
+    if len(matrix) < group_size:
+        return []
+    degree = neighbour_counts(matrix, threshold)
+    free = np.ones(len(matrix), dtype=bool)
+    groups = []
+    for row in np.argsort(degree, kind="stable"):
+        if not free[row] or degree[row] < group_size - 1:
+            continue
+        close = np.flatnonzero(free & _within(matrix, row, threshold))
+        if len(close) < group_size:
+            continue
+        found = find_group_indices(
+            matrix[close],
+            group_size,
+            threshold,
+            required=int(np.flatnonzero(close == row)[0]),
+            rank=degree[close],
+        )
+        if found is None:
+            continue
+        members = close[found]
+        free[members] = False
+        groups.append(members)
+    return groups
+
+
+def find_eligible_group(users, group_size=5, threshold=1.0, mode="sweep"):
+    """
+    Find any group of `group_size` users (from a given meeting time queue)
+    that are similar enough based on the features.
+
+    The queue is loaded into a feature matrix once. The default "sweep" mode
+    sorts it on each feature in turn and slides a window of width `threshold`
+    over it, so a lookup costs about O(n log n) for a typical queue.
+    mode="combinations" tries every group and is kept as a reference for tests.
+    """
+    matrix = feature_matrix(users)
+    found = find_group_indices(matrix, group_size, threshold, mode)
+    if found is None:
+        return None
+    return [users[row] for row in found]
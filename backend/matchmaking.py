@@ -0,0 +1,289 @@
+"""
+Everything that turns waiting users into events, shared by the Flask and
+FastAPI apps: matching rounds, venue assignment, the email outbox and the
+expiry sweeper. Each app calls start_background_workers() once per process.
+"""
+import os
+import uuid
+from datetime import datetime, timedelta
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import pytz
+from dotenv import load_dotenv
+from icalendar import Calendar, Event as CalendarEvent
+
+import mongo
+from events import compact_event, hydrate_event
+from match_status import MatchStatus
+from outbox import EmailOutbox
+from queue_index import QueueIndex
+from scheduler import MatchScheduler
+from smtp_pool import SMTPPool
+from sweeper import WaitingSweeper, meeting_expiry
+from venues import VenueCache
+
+load_dotenv()
+
+SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
+SMTP_PORT = int(os.getenv('SMTP_PORT', 587))
+SMTP_USERNAME = os.getenv('SMTP_USERNAME')
+SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
+SMTP_FROM = os.getenv('SMTP_FROM', SMTP_USERNAME or 'nightspot@localhost')
+# Set SMTP_USE_TLS=false to send through a local SMTP sink without STARTTLS
+SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+
+# Group emails share up to SMTP_POOL_SIZE authenticated SMTP sessions
+SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', 2))
+SMTP_IDLE_TIMEOUT = float(os.getenv('SMTP_IDLE_TIMEOUT', 60))
+# Seconds to wait for the SMTP server to connect or answer a command
+SMTP_TIMEOUT = float(os.getenv('SMTP_TIMEOUT', 30))
+
+# Group emails are delivered by EMAIL_WORKERS outbox workers, with up to
+# EMAIL_MAX_ATTEMPTS tries per event
+EMAIL_WORKERS = int(os.getenv('EMAIL_WORKERS', 2))
+EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', 5))
+
+# Matching rounds run every MATCH_INTERVAL_SECONDS, or as soon as a
+# meeting time has MATCH_QUEUE_TRIGGER users waiting
+MATCH_INTERVAL_SECONDS = float(os.getenv('MATCH_INTERVAL_SECONDS', 30))
+MATCH_QUEUE_TRIGGER = int(os.getenv('MATCH_QUEUE_TRIGGER', 20))
+
+# Groups are claimed atomically, so every worker process can run matching
+# rounds. Set MATCH_REFRESH_QUEUE when running more than one, so each round
+# sees users who joined through the others. A claim left by a crashed
+# process expires after MATCH_CLAIM_TIMEOUT seconds
+MATCH_REFRESH_QUEUE = os.getenv('MATCH_REFRESH_QUEUE', 'false').lower() == 'true'
+MATCH_CLAIM_RETRIES = int(os.getenv('MATCH_CLAIM_RETRIES', 3))
+MATCH_CLAIM_TIMEOUT = float(os.getenv('MATCH_CLAIM_TIMEOUT', 300))
+
+# Waiting entries expire WAITING_EXPIRY_GRACE seconds after their meeting
+# time (read in MEETING_TIMEZONE). Every SWEEP_INTERVAL_SECONDS expired
+# entries are archived and their users told, SWEEP_BATCH_SIZE at a time
+MEETING_TIMEZONE = os.getenv('MEETING_TIMEZONE', 'America/Chicago')
+WAITING_EXPIRY_GRACE = float(os.getenv('WAITING_EXPIRY_GRACE', 3600))
+SWEEP_INTERVAL_SECONDS = float(os.getenv('SWEEP_INTERVAL_SECONDS', 300))
+SWEEP_BATCH_SIZE = int(os.getenv('SWEEP_BATCH_SIZE', 500))
+
+VENUE_CACHE_TTL = float(os.getenv('VENUE_CACHE_TTL', 300))
+VENUE_DEFAULT_CAPACITY = int(os.getenv('VENUE_DEFAULT_CAPACITY', 3))
+
+users_collection = mongo.collection('users')
+waiting_users_collection = mongo.collection('waiting_users')
+events_collection = mongo.collection('events')
+locations_collection = mongo.collection('locations')  # Add locations collection
+
+# Venues are kept in memory and refreshed every VENUE_CACHE_TTL seconds. A
+# venue without a capacity field takes VENUE_DEFAULT_CAPACITY groups per
+# meeting time
+venue_cache = VenueCache(
+    locations_collection,
+    mongo.collection('venue_bookings'),
+    ttl=VENUE_CACHE_TTL,
+    default_capacity=VENUE_DEFAULT_CAPACITY
+)
+
+# Resident index of the waiting queue, so matching rounds never re-read it
+queue_index = QueueIndex(waiting_users_collection, claim_timeout=MATCH_CLAIM_TIMEOUT)
+
+
+def create_calendar_invite(meeting_time, group_members, location):
+    """Create a calendar invite for the event"""
+    cal = Calendar()
+    cal.add('prodid', '-//NightSpot Event//nightspot.com//')
+    cal.add('version', '2.0')
+    
+    event = CalendarEvent()
+    event.add('summary', 'NightSpot Group Meetup')
+    
+    # Convert meeting_time string to datetime
+    start_time = datetime.strptime(meeting_time, "%Y-%m-%d %H:%M")
+    end_time = start_time + timedelta(hours=2)  # Default 2-hour event
+    
+    # Add timezone information
+    tz = pytz.timezone(MEETING_TIMEZONE)
+    start_time = tz.localize(start_time)
+    end_time = tz.localize(end_time)
+    
+    event.add('dtstart', start_time)
+    event.add('dtend', end_time)
+    
+    # Add description with group members and location
+    description = "Your NightSpot group meetup!\n\nLocation:\n"
+    description += f"{location['name']}\n{location['address']}\n\nGroup Members:\n"
+    for member in group_members:
+        description += f"- {member['name']}\n"
+    event.add('description', description)
+    
+    # Add location
+    event.add('location', f"{location['name']} - {location['address']}")
+    
+    cal.add_component(event)
+    return cal.to_ical()
+
+
+smtp_pool = SMTPPool(
+    SMTP_SERVER,
+    SMTP_PORT,
+    SMTP_USERNAME,
+    SMTP_PASSWORD,
+    use_tls=SMTP_USE_TLS,
+    max_connections=SMTP_POOL_SIZE,
+    idle_timeout=SMTP_IDLE_TIMEOUT,
+    timeout=SMTP_TIMEOUT
+)
+
+
+def send_group_emails(group, meeting_time, location):
+    """Send emails to all group members with calendar invite. Raises on failure."""
+    # Create calendar invite with location
+    calendar_invite = create_calendar_invite(meeting_time, group, location)
+
+    # Borrow an authenticated session from the SMTP pool
+    with smtp_pool.connection() as server:
+        for user in group:
+            # Create email message
+            msg = MIMEMultipart()
+            msg['From'] = SMTP_FROM
+            msg['To'] = user['email']
+            msg['Subject'] = 'Your NightSpot Group has been Matched!'
+            
+            # Email body
+            body = f"""Hi {user['name']},
+
+Great news! We've found your perfect group for a night out!
+
+Meeting Location:
+{location['name']}
+{location['address']}
+
+Your group is scheduled to meet at {meeting_time}.
+
+Your group members are:
+"""
+            for member in group:
+                if member['email'] != user['email']:
+                    body += f"- {member['name']}\n"
+            
+            body += "\nWe've attached a calendar invite for your convenience. Looking forward to your amazing night out!"
+            
+            msg.attach(MIMEText(body, 'plain'))
+            
+            # Attach calendar invite
+            cal_attachment = MIMEApplication(calendar_invite, _subtype='ics')
+            cal_attachment.add_header('Content-Disposition', 'attachment', filename='nightspot_event.ics')
+            msg.attach(cal_attachment)
+            
+            # Send email
+            server.send_message(msg)
+
+
+def send_event_emails(event):
+    """Deliver the emails for a stored event; used by the email outbox."""
+    event = hydrate_event(event, users_collection, locations_collection)
+    send_group_emails(event['users'], event['meeting_time'], event['location'])
+
+
+email_outbox = EmailOutbox(
+    mongo.collection('email_outbox'),
+    events_collection,
+    send_event_emails,
+    workers=EMAIL_WORKERS,
+    max_attempts=EMAIL_MAX_ATTEMPTS
+)
+
+
+def create_group_event(group, meeting_time):
+    """
+    Store the event for a matched group and queue its emails. Raises only if
+    the event was not stored, so the round can give the group back.
+    """
+    # A venue with room left at this meeting time
+    location = venue_cache.assign(meeting_time)
+
+    # Store references to the members and venue, not copies of them
+    event_doc = {
+        **compact_event(str(uuid.uuid4()), group, meeting_time, location),
+        "email_status": "pending",
+        "email_attempts": 0
+    }
+    try:
+        events_collection.insert_one(event_doc)
+    except Exception:
+        venue_cache.release(location, meeting_time)
+        raise
+
+    # The group is booked from here on; the outbox requeues the event if this fails
+    try:
+        match_status.publish(event_doc)
+        # Emails are sent by the outbox workers, not by the caller
+        email_outbox.enqueue(event_doc['event_id'])
+    except Exception as e:
+        print(f"Error queueing emails for event {event_doc['event_id']}: {str(e)}")
+    return event_doc
+
+
+match_status = MatchStatus(
+    waiting_users_collection,
+    events_collection,
+    hydrate=lambda event: hydrate_event(event, users_collection, locations_collection),
+    archive_collection=mongo.collection('waiting_users_archive')
+)
+
+match_scheduler = MatchScheduler(
+    queue_index,
+    waiting_users_collection,
+    create_group_event,
+    interval=MATCH_INTERVAL_SECONDS,
+    queue_trigger=MATCH_QUEUE_TRIGGER,
+    retries=MATCH_CLAIM_RETRIES,
+    claim_timeout=MATCH_CLAIM_TIMEOUT,
+    refresh=MATCH_REFRESH_QUEUE
+)
+
+def waiting_expiry(meeting_time):
+    return meeting_expiry(meeting_time, MEETING_TIMEZONE, WAITING_EXPIRY_GRACE)
+
+
+def send_expiry_emails(users):
+    """Tell a batch of users whose meeting time passed that no group was found."""
+    with smtp_pool.connection() as server:
+        for user in users:
+            msg = MIMEText(f"""Hi {user['name']},
+
+We couldn't find a group for you for {user['meeting_time']}, so you've been taken out of the queue.
+
+Pick another time and we'll keep looking!""", 'plain')
+            msg['From'] = SMTP_FROM
+            msg['To'] = user['email']
+            msg['Subject'] = 'Your NightSpot request has expired'
+            server.send_message(msg)
+
+
+waiting_sweeper = WaitingSweeper(
+    waiting_users_collection,
+    mongo.collection('waiting_users_archive'),
+    queue_index,
+    notify=send_expiry_emails,
+    expiry=waiting_expiry,
+    interval=SWEEP_INTERVAL_SECONDS,
+    batch_size=SWEEP_BATCH_SIZE,
+    claim_timeout=MATCH_CLAIM_TIMEOUT
+)
+
+
+def add_waiting_user(user):
+    """
+    Track a waiting entry that has just been stored, and wake a matching
+    round early if its meeting time's queue is big enough.
+    """
+    queue_index.add(user)
+    match_scheduler.notify(user['meeting_time'])
+
+
+def start_background_workers():
+    """Start the matching rounds, the email senders and the expiry sweeper."""
+    match_scheduler.start()
+    email_outbox.start()
+    waiting_sweeper.start()
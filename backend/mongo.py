@@ -0,0 +1,185 @@
+"""
+The one MongoDB connection layer for the Flask app and its scripts.
+
+Every module gets its collections from here, so the process shares a
+single MongoClient (one pool, one set of monitor threads) and a single
+database name. Pool size, timeouts and read/write concerns come from the
+environment. The client is created lazily and re-created after a fork, so
+pre-forking servers never share sockets between workers.
+"""
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, monitoring
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
+from werkzeug.local import LocalProxy
+
+load_dotenv()
+
+MONGO_URL = os.getenv('MONGO_URL')
+MONGO_DB_NAME = os.getenv('MONGO_DB_NAME', 'NightSpot')
+
+
+def _int_or_str(value):
+    return int(value) if value.isdigit() else value
+
+
+def client_options():
+    """MongoClient keyword arguments built from the environment."""
+    options = {
+        "maxPoolSize": int(os.getenv('MONGO_MAX_POOL_SIZE', 50)),
+        "minPoolSize": int(os.getenv('MONGO_MIN_POOL_SIZE', 0)),
+        "connectTimeoutMS": int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000)),
+        "serverSelectionTimeoutMS": int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000)),
+        "waitQueueTimeoutMS": int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000)),
+        "retryWrites": os.getenv('MONGO_RETRY_WRITES', 'true').lower() == 'true',
+    }
+    if os.getenv('MONGO_SOCKET_TIMEOUT_MS'):
+        options["socketTimeoutMS"] = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS'))
+    if os.getenv('MONGO_READ_PREFERENCE'):
+        options["readPreference"] = os.getenv('MONGO_READ_PREFERENCE')
+    return options
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Connection pool metrics: connections created and checked out, and how
+    long callers waited to check one out.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.created = 0
+            self.closed = 0
+            self.checked_out = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def _waited(self):
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = self._waited()
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def connection_check_out_failed(self, event):
+        self._waited()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "open_connections": self.created - self.closed,
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "wait_ms_avg": round(1000 * self.wait_seconds_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(1000 * self.wait_seconds_max, 3)
+            }
+
+
+pool_stats = PoolStats()
+
+_client = None
+_db = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def _database(client):
+    write_concern = None
+    if os.getenv('MONGO_WRITE_CONCERN'):
+        write_concern = WriteConcern(w=_int_or_str(os.getenv('MONGO_WRITE_CONCERN')))
+    read_concern = None
+    if os.getenv('MONGO_READ_CONCERN'):
+        read_concern = ReadConcern(os.getenv('MONGO_READ_CONCERN'))
+    return client.get_database(MONGO_DB_NAME, write_concern=write_concern, read_concern=read_concern)
+
+
+def get_client():
+    """The MongoClient for this process, created on first use and after a fork."""
+    global _client, _db, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                if _client_pid != pid:
+                    # Connections inherited from the parent must not be reused
+                    pool_stats.reset()
+                _client = MongoClient(MONGO_URL, event_listeners=[pool_stats], **client_options())
+                _db = _database(_client)
+                _client_pid = pid
+    return _client
+
+
+def get_db():
+    """The application database, with the configured read and write concerns."""
+    get_client()
+    return _db
+
+
+def collection(name):
+    """A proxy to collection `name` that always resolves through this process's client."""
+    return LocalProxy(lambda: get_db()[name])
+
+
+def stats():
+    """Pool configuration and usage for this process."""
+    options = client_options()
+    return {
+        "pid": os.getpid(),
+        "database": MONGO_DB_NAME,
+        "max_pool_size": options["maxPoolSize"],
+        "min_pool_size": options["minPoolSize"],
+        **pool_stats.snapshot()
+    }
+
+
+db = LocalProxy(get_db)
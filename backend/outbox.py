@@ -0,0 +1,155 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+
+
+class EmailOutbox:
+    """
+    Durable queue of group notification emails, stored in a Mongo collection.
+
+    Creating an event enqueues one job; a pool of worker threads claims jobs,
+    calls `send(event)` and retries failures with exponential backoff. The
+    delivery status is mirrored on the event document (`email_status`,
+    `email_attempts`, `email_error`) so clients can read it from there.
+
+    Jobs are keyed by event_id, so enqueueing an event twice is harmless.
+    Every `requeue_interval` seconds the first worker enqueues every event
+    still marked "pending", which covers an event stored by a process that
+    failed or died before its job was written.
+    """
+
+    def __init__(self, collection, events_collection, send, workers=2, max_attempts=5,
+                 backoff_seconds=30, poll_interval=1.0, lock_timeout=300, requeue_interval=300):
+        self.collection = collection
+        self.events_collection = events_collection
+        self.send = send
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.poll_interval = poll_interval
+        self.lock_timeout = lock_timeout
+        self.requeue_interval = requeue_interval
+        self._wake = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """
+        Start the sender workers. Safe to call more than once; starts new
+        workers in a forked child, where the parent's are gone.
+        """
+        with self._start_lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            if self._threads:
+                return
+            for number in range(self.workers):
+                thread = threading.Thread(
+                    target=self._loop, args=(number == 0,), name=f"email-outbox-{number}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def enqueue(self, event_id):
+        """
+        Queue the emails for a stored event. The event should already have
+        been stored with email_status "pending". Does nothing if the event
+        already has a job.
+        """
+        now = datetime.utcnow()
+        self.collection.update_one(
+            {"event_id": event_id},
+            {"$setOnInsert": {
+                "event_id": event_id,
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now
+            }},
+            upsert=True
+        )
+        self._wake.set()
+
+    def requeue_pending(self):
+        """Enqueue every event still marked "pending". Returns how many there were."""
+        requeued = 0
+        for event in self.events_collection.find({"email_status": "pending"}, {"event_id": 1}):
+            self.enqueue(event['event_id'])
+            requeued += 1
+        return requeued
+
+    def _claim(self):
+        """
+        Atomically take the next due job. Jobs left in "sending" by a worker
+        that died are taken again once their lock has timed out.
+        """
+        now = datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"status": "sending", "locked_at": {"$lte": now - timedelta(seconds=self.lock_timeout)}}
+            ]},
+            {"$set": {"status": "sending", "locked_at": now}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _loop(self, requeue=False):
+        requeued_at = None
+        while True:
+            if requeue and (requeued_at is None or time.monotonic() - requeued_at >= self.requeue_interval):
+                requeued_at = time.monotonic()
+                try:
+                    self.requeue_pending()
+                except Exception as e:
+                    print(f"Error requeueing pending emails: {str(e)}")
+            try:
+                job = self._claim()
+            except Exception as e:
+                print(f"Error claiming email job: {str(e)}")
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            try:
+                self._deliver(job)
+            except Exception as e:
+                # The job stays locked and is taken again once lock_timeout passes
+                print(f"Error delivering email job for event {job['event_id']}: {str(e)}")
+
+    def _deliver(self, job):
+        attempts = job['attempts'] + 1
+        try:
+            event = self.events_collection.find_one({"event_id": job['event_id']})
+            if event is None:
+                raise LookupError(f"Event {job['event_id']} not found")
+            self.send(event)
+        except Exception as e:
+            print(f"Error sending emails for event {job['event_id']}: {str(e)}")
+            if attempts >= self.max_attempts:
+                status, job_update = "failed", {}
+            else:
+                delay = self.backoff_seconds * 2 ** (attempts - 1)
+                status = "retrying"
+                job_update = {"next_attempt_at": datetime.utcnow() + timedelta(seconds=delay)}
+            self.collection.update_one(
+                {"_id": job['_id']},
+                {"$set": {"status": "failed" if status == "failed" else "pending",
+                          "attempts": attempts, "last_error": str(e), **job_update}}
+            )
+            self._set_event_status(job['event_id'], status, attempts, str(e))
+            return
+
+        self.collection.update_one(
+            {"_id": job['_id']},
+            {"$set": {"status": "sent", "attempts": attempts, "sent_at": datetime.utcnow()}}
+        )
+        self._set_event_status(job['event_id'], "sent", attempts, None)
+
+    def _set_event_status(self, event_id, status, attempts, error):
+        self.events_collection.update_one(
+            {"event_id": event_id},
+            {"$set": {"email_status": status, "email_attempts": attempts, "email_error": error}}
+        )
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from features import FEATURES
+
+# Fields of a user document returned to the signed-in user.
+PROFILE_FIELDS = ["email", "name", "picture", "is_onboarded", "age", "gender", "race", "hometown"] + FEATURES
+
+
+def identity_key(kind, value):
+    """Cache key for a session id or a raw token, without keeping the token itself."""
+    return f"{kind}:{hashlib.sha256(str(value).encode()).hexdigest()}"
+
+
+class ProfileCache:
+    """
+    Read-through cache of user profiles, keyed by session or token identity.
+
+    Each entry holds the user's document, projected to `fields` and already
+    encoded as JSON,
+    so a repeat read touches neither Mongo nor the JSON encoder. Entries
+    live for `ttl` seconds, or until the `expires_at` given to load() if
+    that is sooner, and invalidate(email) drops every entry for a user;
+    call it after any write to that user. A load that read Mongo before an
+    invalidate() of the same user is not cached, since it may predate the
+    write.
+    """
+
+    def __init__(self, collection, fields=PROFILE_FIELDS, max_size=10000, ttl=300):
+        self.collection = collection
+        self.fields = fields
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._keys_by_email = {}
+        # Bumped by invalidate(); the epoch moves on when the counters are reset
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """The cached JSON for `key`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def load(self, key, email, expires_at=None):
+        """
+        Read `email`'s profile from Mongo, cache it under `key` and return
+        its JSON, or None if there is no such user. `expires_at` is a Unix
+        time after which the entry must not be served, such as a token's exp.
+        """
+        with self._lock:
+            generation = (self._epoch, self._generations.get(email, 0))
+        projection = {field: 1 for field in self.fields}
+        user = self.collection.find_one({"email": email}, projection)
+        if user is None:
+            return None
+        user["id"] = str(user.pop("_id"))
+        body = json.dumps(user, separators=(",", ":"), default=str)
+        lifetime = self.ttl
+        if expires_at is not None:
+            lifetime = min(lifetime, expires_at - time.time())
+        if lifetime <= 0:
+            return body
+        with self._lock:
+            if (self._epoch, self._generations.get(email, 0)) != generation:
+                return body
+            self._entries[key] = (time.monotonic() + lifetime, email, body)
+            self._entries.move_to_end(key)
+            self._keys_by_email.setdefault(email, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+        return body
+
+    def get_or_load(self, key, email, expires_at=None):
+        body = self.get(key)
+        if body is None:
+            body = self.load(key, email, expires_at)
+        return body
+
+    def _drop(self, key):
+        _, email, _ = self._entries.pop(key)
+        keys = self._keys_by_email.get(email)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_email[email]
+
+    def invalidate(self, email):
+        """Forget every cached profile of `email`, including loads still in flight."""
+        with self._lock:
+            for key in list(self._keys_by_email.get(email, ())):
+                self._drop(key)
+            if len(self._generations) >= self.max_size:
+                self._generations.clear()
+                self._epoch += 1
+            self._generations[email] = self._generations.get(email, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,84 @@
+import threading
+from datetime import datetime, timedelta
+
+
+class QueueIndex:
+    """
+    In-memory index of the waiting queue, keyed by meeting time.
+
+    Each meeting time is loaded from `collection` the first time it is used
+    and is then kept up to date through add() and remove(), so neither /join
+    nor the matching rounds have to re-read the queue. The index is per
+    process: writes made through other processes are only seen after
+    reload(). Users claimed by a matching round are not loaded, unless the
+    claim is older than `claim_timeout` seconds and so was left by a
+    crashed process.
+    """
+
+    def __init__(self, collection, claim_timeout=300):
+        self.collection = collection
+        self.claim_timeout = claim_timeout
+        self._buckets = {}
+        self._loaded_all = False
+        self._lock = threading.Lock()
+
+    def _claimable(self):
+        """Filter for entries a matching round may claim, as used by MatchScheduler._claim."""
+        return {"$or": [
+            {"claim": None},
+            {"claimed_at": {"$lte": datetime.utcnow() - timedelta(seconds=self.claim_timeout)}}
+        ]}
+
+    def _bucket(self, meeting_time):
+        bucket = self._buckets.get(meeting_time)
+        if bucket is None:
+            bucket = {}
+            for user in self.collection.find({"meeting_time": meeting_time, **self._claimable()}):
+                bucket[user['id']] = user
+            self._buckets[meeting_time] = bucket
+        return bucket
+
+    def add(self, user):
+        """Add a user that has been inserted into the collection."""
+        with self._lock:
+            self._bucket(user['meeting_time'])[user['id']] = user
+
+    def remove(self, users):
+        """Remove users that have been deleted from the collection."""
+        with self._lock:
+            for user in users:
+                bucket = self._buckets.get(user['meeting_time'])
+                if bucket is not None:
+                    bucket.pop(user['id'], None)
+
+    def reload(self, meeting_time):
+        """Re-read `meeting_time` from the collection."""
+        with self._lock:
+            self._buckets.pop(meeting_time, None)
+            self._bucket(meeting_time)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def size(self, meeting_time):
+        with self._lock:
+            return len(self._bucket(meeting_time))
+
+    def meeting_times(self, refresh=False):
+        """
+        All meeting times with waiting users, loading them on first use.
+        With `refresh`, the collection is asked again, so meeting times first
+        joined through other processes are found.
+        """
+        with self._lock:
+            if refresh or not self._loaded_all:
+                for meeting_time in self.collection.distinct("meeting_time", self._claimable()):
+                    self._bucket(meeting_time)
+                self._loaded_all = True
+            return [meeting_time for meeting_time, bucket in self._buckets.items() if bucket]
+
+    def users(self, meeting_time):
+        """A snapshot of the users waiting for `meeting_time`."""
+        with self._lock:
+            return list(self._bucket(meeting_time).values())
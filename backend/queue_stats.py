@@ -0,0 +1,99 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from features import FEATURES
+
+# Scores run from 0 to 5; histograms use one bin per point, with 5 in the last bin.
+HISTOGRAM_BINS = 5
+
+
+def _histogram_stage(feature):
+    """Count waiting users per (meeting_time, score bin) for one feature."""
+    return [
+        {"$group": {
+            "_id": {
+                "meeting_time": "$meeting_time",
+                "bin": {"$min": [{"$floor": {"$ifNull": [f"${feature}", 0]}}, HISTOGRAM_BINS - 1]}
+            },
+            "count": {"$sum": 1}
+        }}
+    ]
+
+
+class QueueStats:
+    """
+    Queue depth, score distributions and match rate, computed by Mongo.
+
+    The waiting queue is summarised with one $facet pipeline: a count and
+    the oldest entry per meeting time, plus a histogram of every feature.
+    The match rate counts events created in the last `window` seconds,
+    using the creation time in their ObjectId. Results are cached for `ttl`
+    seconds so dashboards cannot put load on the database.
+    """
+
+    def __init__(self, waiting_collection, events_collection, ttl=10, window=3600):
+        self.waiting_collection = waiting_collection
+        self.events_collection = events_collection
+        self.ttl = ttl
+        self.window = window
+        self._cached = None
+        self._expires = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """The current stats, recomputed at most once every `ttl` seconds."""
+        with self._lock:
+            if self._cached is None or time.monotonic() >= self._expires:
+                self._cached = self.compute()
+                self._expires = time.monotonic() + self.ttl
+            return self._cached
+
+    def compute(self):
+        now = datetime.now(timezone.utc)
+        facets = {
+            "depth": [
+                {"$group": {"_id": "$meeting_time", "waiting": {"$sum": 1}, "oldest": {"$min": "$_id"}}}
+            ]
+        }
+        for feature in FEATURES:
+            facets[feature] = _histogram_stage(feature)
+        result = next(self.waiting_collection.aggregate([{"$facet": facets}]), {})
+
+        meeting_times = {}
+        for row in result.get("depth", []):
+            meeting_times[row["_id"]] = {
+                "waiting": row["waiting"],
+                "oldest_wait_seconds": round((now - row["oldest"].generation_time).total_seconds(), 1),
+                "histograms": {feature: [0] * HISTOGRAM_BINS for feature in FEATURES}
+            }
+        for feature in FEATURES:
+            for row in result.get(feature, []):
+                stats = meeting_times.get(row["_id"]["meeting_time"])
+                if stats is not None:
+                    stats["histograms"][feature][int(row["_id"]["bin"])] += row["count"]
+
+        since = ObjectId.from_datetime(now - timedelta(seconds=self.window))
+        matched = next(self.events_collection.aggregate([
+            {"$match": {"_id": {"$gte": since}}},
+            {"$group": {
+                "_id": None,
+                "events": {"$sum": 1},
+                # Events stored before the compact shape list their members under "users"
+                "users": {"$sum": {"$size": {"$ifNull": ["$members", {"$ifNull": ["$users", []]}]}}}
+            }}
+        ]), {"events": 0, "users": 0})
+
+        return {
+            "generated_at": now,
+            "waiting": sum(stats["waiting"] for stats in meeting_times.values()),
+            "meeting_times": meeting_times,
+            "matches": {
+                "window_seconds": self.window,
+                "events": matched["events"],
+                "users": matched["users"],
+                "events_per_hour": round(matched["events"] * 3600 / self.window, 2)
+            }
+        }
@@ -0,0 +1,155 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from features import feature_matrix
+from matching import partition_groups
+
+
+class MatchScheduler:
+    """
+    Forms groups in periodic rounds instead of inside /join.
+
+    A background thread runs a round every `interval` seconds, or sooner when
+    a meeting time's queue reaches `queue_trigger` users. Each round splits
+    the whole pool of every meeting time with partition_groups, claims each
+    group, hands it to `on_group` and then removes it from the queue.
+    `on_group` must raise only if it stored nothing for the group: the claim
+    is then released and the users stay in the pool.
+
+    Claims make it safe to run a scheduler in every worker process. A group
+    is claimed by setting one claim token on all of its waiting entries with
+    a conditional update that only matches unclaimed entries; if fewer than
+    all of them change, another process got there first, the partial claim
+    is released, and the pool is reloaded and partitioned again, up to
+    `retries` times. Claims older than `claim_timeout` seconds (left by a
+    crashed process) count as unclaimed. With `refresh`, every round looks up
+    the meeting times and reloads their pools from Mongo, so users who joined
+    through other processes are seen.
+    """
+
+    def __init__(self, index, collection, on_group, interval=30, queue_trigger=20, group_size=5, threshold=1.0,
+                 retries=3, claim_timeout=300, refresh=False):
+        self.index = index
+        self.collection = collection
+        self.on_group = on_group
+        self.interval = interval
+        self.queue_trigger = queue_trigger
+        self.group_size = group_size
+        self.threshold = threshold
+        self.retries = retries
+        self.claim_timeout = claim_timeout
+        self.refresh = refresh
+        self.last_rounds = {}
+        self._wake = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """
+        Start the background thread. Safe to call more than once; starts a
+        new thread in a forked child, where the parent's is gone.
+        """
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="match-scheduler", daemon=True)
+                self._thread.start()
+
+    def notify(self, meeting_time):
+        """Called after a user joins; wakes the thread early if the queue is big enough."""
+        if self.index.size(meeting_time) >= self.queue_trigger:
+            self._wake.set()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.run_round()
+            except Exception as e:
+                print(f"Error in matching round: {str(e)}")
+
+    def run_round(self):
+        """Run one matching round over every meeting time."""
+        return [self.run_round_for(meeting_time) for meeting_time in self.index.meeting_times(refresh=self.refresh)]
+
+    def _claim(self, group):
+        """
+        Claim every user of `group` for this process. Returns the claim
+        token, or None if any of them was already claimed or has left.
+        """
+        token = uuid.uuid4().hex
+        now = datetime.utcnow()
+        ids = [user['id'] for user in group]
+        result = self.collection.update_many(
+            {
+                "id": {"$in": ids},
+                "$or": [
+                    {"claim": None},
+                    {"claimed_at": {"$lte": now - timedelta(seconds=self.claim_timeout)}}
+                ]
+            },
+            {"$set": {"claim": token, "claimed_at": now}}
+        )
+        if result.modified_count == len(ids):
+            return token
+        self._release(token)
+        return None
+
+    def _release(self, token):
+        self.collection.update_many({"claim": token}, {"$unset": {"claim": "", "claimed_at": ""}})
+
+    def run_round_for(self, meeting_time):
+        """
+        Group as many waiting users for `meeting_time` as possible and report
+        how long it took, how many groups were formed and how many were lost
+        to other processes.
+        """
+        started = time.perf_counter()
+        if self.refresh:
+            self.index.reload(meeting_time)
+        users = self.index.users(meeting_time)
+        waiting = len(users)
+
+        formed = 0
+        conflicts = 0
+        for attempt in range(self.retries + 1):
+            groups = partition_groups(feature_matrix(users), self.group_size, self.threshold)
+            lost = 0
+            for rows in groups:
+                group = [users[row] for row in rows]
+                token = self._claim(group)
+                if token is None:
+                    lost += 1
+                    continue
+                try:
+                    self.on_group(group, meeting_time)
+                except Exception as e:
+                    self._release(token)
+                    print(f"Error creating group for {meeting_time}: {str(e)}")
+                    continue
+                self.collection.delete_many({"claim": token})
+                self.index.remove(group)
+                formed += 1
+
+            conflicts += lost
+            if not lost or attempt == self.retries:
+                break
+            # Another process took some of these users: start again from what is left
+            self.index.reload(meeting_time)
+            users = self.index.users(meeting_time)
+
+        stats = {
+            "meeting_time": meeting_time,
+            "waiting": waiting,
+            "groups": formed,
+            "conflicts": conflicts,
+            "seconds": time.perf_counter() - started,
+        }
+        self.last_rounds[meeting_time] = stats
+        print(
+            f"Matching round for {meeting_time}: {formed} groups from {waiting} users "
+            f"({conflicts} conflicts) in {stats['seconds']:.3f}s"
+        )
+        return stats
@@ -0,0 +1,119 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from feature_extraction import average_features, score_answers, score_answers_async
+from local_scorer import LexiconScorer
+
+POLICIES = ("local", "remote", "local_first")
+
+# Remote refinement for the local_first policy runs here, off the request thread
+_refinements = ThreadPoolExecutor(max_workers=2, thread_name_prefix="refine")
+# Refinement tasks started by score_async, kept referenced until they finish
+_background = set()
+
+
+class GeminiScorer:
+    """Remote scorer: Gemini, behind the feature cache."""
+
+    name = "gemini"
+
+    def __init__(self, batch=True, cache=None):
+        self.batch = batch
+        self.cache = cache
+
+    def score_questionnaire(self, pairs):
+        return score_answers(pairs, batch=self.batch, cache=self.cache)
+
+    async def score_questionnaire_async(self, pairs):
+        return await score_answers_async(pairs, batch=self.batch, cache=self.cache)
+
+
+class LocalScorer:
+    """Adapts a per-answer local model such as LexiconScorer to a questionnaire."""
+
+    def __init__(self, model=None):
+        self.model = model or LexiconScorer()
+        self.name = self.model.name
+
+    def score_questionnaire(self, pairs):
+        return average_features(self.model.score(pairs))
+
+
+class FeatureScorer:
+    """
+    Chooses between the local and the remote scorer.
+
+    policy="local" only uses the local model. policy="remote" uses Gemini and
+    falls back to the local model if Gemini fails. policy="local_first"
+    answers with the local scores straight away and refines them with
+    Gemini in the background, passing the refined scores to `on_refined`.
+    Callers that store the local scores pass refine=False and call refine()
+    once they are stored, so the refined scores are always written last.
+    """
+
+    def __init__(self, remote, local, policy="remote"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scorer policy: {policy}")
+        self.remote = remote
+        self.local = local
+        self.policy = policy
+
+    def score(self, pairs, on_refined=None, refine=True):
+        """Averaged feature scores for a list of (question, answer) pairs."""
+        if self.policy == "local":
+            return self.local.score_questionnaire(pairs)
+
+        if self.policy == "local_first":
+            if refine:
+                self.refine(pairs, on_refined)
+            return self.local.score_questionnaire(pairs)
+
+        try:
+            return self.remote.score_questionnaire(pairs)
+        except Exception as e:
+            print(f"Remote scoring failed, using {self.local.name}: {str(e)}")
+            return self.local.score_questionnaire(pairs)
+
+    def refine(self, pairs, on_refined=None):
+        """Under local_first, score `pairs` remotely in the background and pass the result to `on_refined`."""
+        if self.policy == "local_first" and pairs:
+            _refinements.submit(self._refine, pairs, on_refined)
+
+    async def score_async(self, pairs, on_refined=None, refine=True):
+        """score() for asyncio callers; the remote scorer is awaited, not run in a thread."""
+        if self.policy == "local":
+            return self.local.score_questionnaire(pairs)
+
+        if self.policy == "local_first":
+            if refine:
+                self.refine_async(pairs, on_refined)
+            return self.local.score_questionnaire(pairs)
+
+        try:
+            return await self.remote.score_questionnaire_async(pairs)
+        except Exception as e:
+            print(f"Remote scoring failed, using {self.local.name}: {str(e)}")
+            return self.local.score_questionnaire(pairs)
+
+    def refine_async(self, pairs, on_refined=None):
+        """refine() for asyncio callers; `on_refined` is awaited. Call from inside the event loop."""
+        if self.policy == "local_first" and pairs:
+            task = asyncio.ensure_future(self._refine_async(pairs, on_refined))
+            _background.add(task)
+            task.add_done_callback(_background.discard)
+
+    async def _refine_async(self, pairs, on_refined):
+        try:
+            scores = await self.remote.score_questionnaire_async(pairs)
+            if on_refined:
+                await on_refined(scores)
+        except Exception as e:
+            print(f"Error refining feature scores: {str(e)}")
+
+    def _refine(self, pairs, on_refined):
+        try:
+            scores = self.remote.score_questionnaire(pairs)
+            if on_refined:
+                on_refined(scores)
+        except Exception as e:
+            print(f"Error refining feature scores: {str(e)}")
@@ -0,0 +1,152 @@
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from itertools import count
+
+
+class _PooledConnection:
+    """An authenticated SMTP session plus the counters reported by the pool."""
+
+    _ids = count(1)
+
+    def __init__(self, server):
+        self.id = next(self._ids)
+        self.server = server
+        self.opened_at = time.time()
+        self.last_used = self.opened_at
+        self.messages = 0
+        self.failures = 0
+
+    def send_message(self, msg):
+        self.server.send_message(msg)
+        self.messages += 1
+        self.last_used = time.time()
+
+    def stats(self):
+        age = max(time.time() - self.opened_at, 1e-9)
+        return {
+            "id": self.id,
+            "messages": self.messages,
+            "failures": self.failures,
+            "age_seconds": round(age, 3),
+            "messages_per_second": round(self.messages / age, 3)
+        }
+
+
+class SMTPPool:
+    """
+    Pool of reusable, authenticated SMTP connections.
+
+    At most `max_connections` sessions are in use at once. Idle sessions are
+    kept for `idle_timeout` seconds; one that has been idle for more than
+    `noop_after` seconds is checked with NOOP before reuse and replaced if
+    the server has dropped it. A session that fails while in use is closed
+    rather than returned to the pool. Connecting and every SMTP command give
+    up after `timeout` seconds, so a stalled server cannot hold a worker.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True,
+                 max_connections=2, idle_timeout=60, noop_after=10, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self.timeout = timeout
+        self.opened = 0
+        self.reconnects = 0
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._idle = []
+        self._live = {}
+        self._lock = threading.Lock()
+
+    def _open(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        conn = _PooledConnection(server)
+        with self._lock:
+            self.opened += 1
+            self._live[conn.id] = conn
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._live.pop(conn.id, None)
+        try:
+            conn.server.quit()
+        except Exception:
+            conn.server.close()
+
+    def _healthy(self, conn):
+        idle = time.time() - conn.last_used
+        if idle > self.idle_timeout:
+            return False
+        if idle <= self.noop_after:
+            return True
+        try:
+            return conn.server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._open()
+            if self._healthy(conn):
+                return conn
+            self._discard(conn)
+            with self._lock:
+                self.reconnects += 1
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a session for sending one or more messages:
+
+            with pool.connection() as conn:
+                conn.send_message(msg)
+        """
+        with self._slots:
+            conn = self._checkout()
+            try:
+                yield conn
+            except Exception:
+                conn.failures += 1
+                self._discard(conn)
+                raise
+            conn.last_used = time.time()
+            with self._lock:
+                self._idle.append(conn)
+
+    def close(self):
+        """Close every idle session."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            live = list(self._live.values())
+            idle = len(self._idle)
+        return {
+            "max_connections": self.max_connections,
+            "open": len(live),
+            "idle": idle,
+            "opened": self.opened,
+            "reconnects": self.reconnects,
+            "connections": [conn.stats() for conn in live]
+        }
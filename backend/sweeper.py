@@ -0,0 +1,150 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytz
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+MEETING_TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+
+def meeting_expiry(meeting_time, timezone="America/Chicago", grace=3600):
+    """
+    When a waiting entry for `meeting_time` stops being useful: `grace`
+    seconds after the meeting starts, as a naive UTC datetime the way Mongo
+    stores it. None if `meeting_time` is not in MEETING_TIME_FORMAT.
+    """
+    try:
+        start = datetime.strptime(meeting_time, MEETING_TIME_FORMAT)
+    except (TypeError, ValueError):
+        return None
+    start = pytz.timezone(timezone).localize(start).astimezone(pytz.utc).replace(tzinfo=None)
+    return start + timedelta(seconds=grace)
+
+
+class WaitingSweeper:
+    """
+    Moves waiting entries whose meeting time has passed out of the queue.
+
+    Every `interval` seconds a background thread takes expired entries
+    `batch_size` at a time and claims them with the same claim field as a
+    matching round, so an entry is either grouped or swept, never both. The
+    claimed entries are copied to `archive` (keeping their _id, so a retried
+    batch is not archived twice), deleted from the queue and the index, and
+    passed to `notify`. Claims older than `claim_timeout` seconds, left by a
+    crashed round or sweep, are taken over. The TTL index on expires_at only
+    removes what the sweeper has missed.
+    """
+
+    def __init__(self, collection, archive, index, notify=None, expiry=meeting_expiry,
+                 interval=300, batch_size=500, claim_timeout=300):
+        self.collection = collection
+        self.archive = archive
+        self.index = index
+        self.notify = notify
+        self.expiry = expiry
+        self.interval = interval
+        self.batch_size = batch_size
+        self.claim_timeout = claim_timeout
+        self.swept = 0
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the background thread. Safe to call more than once."""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="waiting-sweeper", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        try:
+            self.backfill()
+        except Exception as e:
+            print(f"Error backfilling waiting entry expiry: {str(e)}")
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error sweeping waiting entries: {str(e)}")
+            time.sleep(self.interval)
+
+    def backfill(self):
+        """Set expires_at on entries stored before it existed."""
+        updated = 0
+        while True:
+            batch = list(
+                self.collection.find({"expires_at": {"$exists": False}}, {"meeting_time": 1}).limit(self.batch_size)
+            )
+            if not batch:
+                break
+            self.collection.bulk_write([
+                UpdateOne({"_id": user['_id']}, {"$set": {"expires_at": self.expiry(user.get('meeting_time'))}})
+                for user in batch
+            ], ordered=False)
+            updated += len(batch)
+        if updated:
+            print(f"Set expiry on {updated} waiting entries")
+        return updated
+
+    def sweep(self, now=None):
+        """Archive every expired entry. Returns how many were removed."""
+        now = now or datetime.utcnow()
+        removed = 0
+        while True:
+            claimable = {
+                "expires_at": {"$lte": now},
+                "$or": [
+                    {"claim": None},
+                    {"claimed_at": {"$lte": datetime.utcnow() - timedelta(seconds=self.claim_timeout)}}
+                ]
+            }
+            ids = [user['_id'] for user in self.collection.find(claimable, {"_id": 1}).limit(self.batch_size)]
+            if not ids:
+                break
+
+            # A round may claim some of them between the find and this update
+            token = f"sweep-{uuid.uuid4().hex}"
+            self.collection.update_many(
+                {"_id": {"$in": ids}, **claimable},
+                {"$set": {"claim": token, "claimed_at": datetime.utcnow()}}
+            )
+            batch = list(self.collection.find({"claim": token}))
+
+            if batch:
+                archived_at = datetime.utcnow()
+                try:
+                    self.archive.insert_many(
+                        [
+                            {
+                                **{key: value for key, value in user.items() if key not in ("claim", "claimed_at")},
+                                "archived_at": archived_at,
+                                "reason": "expired"
+                            }
+                            for user in batch
+                        ],
+                        ordered=False
+                    )
+                except BulkWriteError as e:
+                    # Entries archived by an earlier, interrupted pass
+                    if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                        raise
+
+                result = self.collection.delete_many({"claim": token})
+                self.index.remove(batch)
+                removed += result.deleted_count
+
+                if self.notify:
+                    try:
+                        self.notify(batch)
+                    except Exception as e:
+                        print(f"Error notifying {len(batch)} expired waiting users: {str(e)}")
+            if len(ids) < self.batch_size:
+                break
+
+        self.swept += removed
+        if removed:
+            print(f"Swept {removed} expired waiting entries")
+        return removed
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from matching import find_group_indices, groups_within_threshold, partition_groups
+
+
+def random_matrix(seed, rows, features=4, step=0.5):
+    """Scores on the 0-5 scale in steps of `step`, so ties are common."""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, int(5 / step) + 1, size=(rows, features)) * step
+
+
+def fits(matrix, group, threshold):
+    return bool(groups_within_threshold(matrix, np.asarray(group)[None, :], threshold)[0])
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_sweep_agrees_with_combinations(seed):
+    rng = np.random.default_rng(seed)
+    group_size = int(rng.integers(2, 5))
+    threshold = float(rng.choice([0.5, 1.0, 1.5]))
+    matrix = random_matrix(seed, int(rng.integers(group_size, 14)))
+
+    swept = find_group_indices(matrix, group_size, threshold, mode="sweep")
+    reference = find_group_indices(matrix, group_size, threshold, mode="combinations")
+
+    assert (swept is None) == (reference is None)
+    if swept is not None:
+        assert len(set(swept.tolist())) == group_size
+        assert fits(matrix, swept, threshold)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_required_row_agrees_with_combinations(seed):
+    rng = np.random.default_rng(seed + 1000)
+    group_size = int(rng.integers(2, 5))
+    threshold = float(rng.choice([0.5, 1.0, 1.5]))
+    matrix = random_matrix(seed + 1000, int(rng.integers(group_size, 12)))
+    required = int(rng.integers(len(matrix)))
+
+    swept = find_group_indices(matrix, group_size, threshold, mode="sweep", required=required)
+    reference = find_group_indices(matrix, group_size, threshold, mode="combinations", required=required)
+
+    assert (swept is None) == (reference is None)
+    if swept is not None:
+        assert required in swept.tolist()
+        assert len(set(swept.tolist())) == group_size
+        assert fits(matrix, swept, threshold)
+
+
+def test_identical_rows_form_a_group():
+    matrix = np.full((6, 4), 2.5)
+    found = find_group_indices(matrix, 5, 0.0)
+    assert found is not None
+    assert len(set(found.tolist())) == 5
+
+
+def test_range_equal_to_threshold_is_within_it():
+    # 4.4 - 3.4 is slightly more than 1.0 in floating point
+    matrix = np.array([[3.4], [4.4], [3.9]])
+    assert 4.4 - 3.4 > 1.0
+    for mode in ("sweep", "combinations"):
+        assert find_group_indices(matrix, 3, 1.0, mode=mode) is not None
+        assert find_group_indices(matrix, 3, 0.9, mode=mode) is None
+
+
+def test_required_row_outside_every_group():
+    matrix = np.array([[0.0], [0.0], [0.0], [5.0]])
+    assert find_group_indices(matrix, 3, 1.0) is not None
+    assert find_group_indices(matrix, 3, 1.0, required=3) is None
+    found = find_group_indices(matrix, 3, 1.0, required=1)
+    assert 1 in found.tolist()
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        find_group_indices(np.zeros((3, 1)), 2, 1.0, mode="greedy")
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_partition_groups_are_disjoint_and_similar(seed):
+    group_size = 3
+    threshold = 1.0
+    matrix = random_matrix(seed + 2000, 60)
+
+    groups = partition_groups(matrix, group_size, threshold)
+
+    rows = [row for group in groups for row in group.tolist()]
+    assert len(rows) == len(set(rows))
+    for group in groups:
+        assert len(group) == group_size
+        assert fits(matrix, group, threshold)
+
+
+def test_partition_groups_places_every_row_when_possible():
+    matrix = np.repeat(np.array([[0.0, 0.0], [5.0, 5.0], [2.5, 2.5]]), 4, axis=0)
+    groups = partition_groups(matrix, 4, 1.0)
+    assert sorted(row for group in groups for row in group.tolist()) == list(range(12))
+
+
+def test_partition_groups_small_pool():
+    assert partition_groups(np.zeros((2, 4)), 3, 1.0) == []
@@ -0,0 +1,70 @@
+import time
+
+import mongomock
+
+from outbox import EmailOutbox
+
+
+def outbox(send=lambda event: None):
+    db = mongomock.MongoClient().db
+    return EmailOutbox(db.email_outbox, db.events, send, backoff_seconds=0)
+
+
+def test_enqueue_is_idempotent():
+    box = outbox()
+    box.enqueue("a")
+    box.enqueue("a")
+    assert box.collection.count_documents({"event_id": "a"}) == 1
+
+
+def test_requeue_pending_covers_events_without_a_job():
+    box = outbox()
+    box.events_collection.insert_many([
+        {"event_id": "lost", "email_status": "pending"},
+        {"event_id": "queued", "email_status": "pending"},
+        {"event_id": "done", "email_status": "sent"},
+    ])
+    box.enqueue("queued")
+    assert box.requeue_pending() == 2
+    assert sorted(job["event_id"] for job in box.collection.find()) == ["lost", "queued"]
+
+
+def test_delivered_job_marks_the_event_sent():
+    sent = []
+    box = outbox(sent.append)
+    box.events_collection.insert_one({"event_id": "a", "email_status": "pending"})
+    box.enqueue("a")
+    box._deliver(box._claim())
+    assert [event["event_id"] for event in sent] == ["a"]
+    assert box.events_collection.find_one({"event_id": "a"})["email_status"] == "sent"
+    assert box.collection.find_one({"event_id": "a"})["status"] == "sent"
+
+
+def test_failed_send_is_retried():
+    def fail(event):
+        raise OSError("smtp down")
+
+    box = outbox(fail)
+    box.events_collection.insert_one({"event_id": "a", "email_status": "pending"})
+    box.enqueue("a")
+    box._deliver(box._claim())
+    assert box.events_collection.find_one({"event_id": "a"})["email_status"] == "retrying"
+    assert box.collection.find_one({"event_id": "a"})["status"] == "pending"
+
+
+def test_worker_survives_a_failing_write():
+    box = outbox()
+    box.events_collection.insert_one({"event_id": "a", "email_status": "pending"})
+    box.enqueue("a")
+    failures = []
+
+    def failing_write(*args, **kwargs):
+        failures.append(args)
+        raise ConnectionError("mongo went away")
+
+    box.events_collection.update_one = failing_write
+    box.poll_interval = 0.01
+    box.start()
+    time.sleep(0.2)
+    assert failures
+    assert [thread.is_alive() for thread in box._threads] == [True, True]
@@ -0,0 +1,50 @@
+import json
+import time
+
+import mongomock
+
+from profile_cache import ProfileCache
+
+
+def cache(**options):
+    users = mongomock.MongoClient().db.users
+    users.insert_one({"email": "u@x", "name": "old"})
+    return ProfileCache(users, ["email", "name"], **options)
+
+
+def test_repeat_reads_are_cached_until_invalidated():
+    profiles = cache()
+    assert json.loads(profiles.get_or_load("k", "u@x"))["name"] == "old"
+    profiles.collection.update_one({"email": "u@x"}, {"$set": {"name": "new"}})
+    assert json.loads(profiles.get_or_load("k", "u@x"))["name"] == "old"
+    profiles.invalidate("u@x")
+    assert json.loads(profiles.get_or_load("k", "u@x"))["name"] == "new"
+
+
+def test_load_racing_a_write_is_not_cached():
+    profiles = cache()
+    users = profiles.collection
+
+    class RacingUsers:
+        def find_one(self, *args, **kwargs):
+            user = users.find_one(*args, **kwargs)
+            # A write and its invalidation land after the read
+            users.update_one({"email": "u@x"}, {"$set": {"name": "new"}})
+            profiles.invalidate("u@x")
+            return user
+
+    profiles.collection = RacingUsers()
+    assert json.loads(profiles.load("k", "u@x"))["name"] == "old"
+    profiles.collection = users
+    assert profiles.get("k") is None
+    assert json.loads(profiles.get_or_load("k", "u@x"))["name"] == "new"
+
+
+def test_entries_end_at_expires_at():
+    profiles = cache(ttl=300)
+    profiles.load("k", "u@x", expires_at=time.time() + 0.05)
+    assert profiles.get("k") is not None
+    time.sleep(0.1)
+    assert profiles.get("k") is None
+    profiles.load("k", "u@x", expires_at=time.time() - 1)
+    assert profiles.get("k") is None
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import mongomock
+
+from features import FEATURES
+from queue_index import QueueIndex
+from scheduler import MatchScheduler
+
+
+def waiting(collection, count, meeting_time="2099-06-01 20:00", **fields):
+    for number in range(count):
+        collection.insert_one({
+            "id": f"{meeting_time}-{number}-{len(fields)}",
+            "meeting_time": meeting_time,
+            **{feature: 2.0 for feature in FEATURES},
+            **fields
+        })
+
+
+def scheduler(collection, on_group, **options):
+    return MatchScheduler(QueueIndex(collection), collection, on_group, refresh=True, **options)
+
+
+def test_round_groups_and_removes_users():
+    collection = mongomock.MongoClient().db.waiting_users
+    waiting(collection, 5)
+    groups = []
+    scheduler(collection, lambda group, meeting_time: groups.append(group)).run_round()
+    assert len(groups) == 1
+    assert collection.count_documents({}) == 0
+
+
+def test_stale_claims_are_taken_over():
+    collection = mongomock.MongoClient().db.waiting_users
+    waiting(collection, 5, claim="crashed", claimed_at=datetime.utcnow() - timedelta(hours=1))
+    groups = []
+    scheduler(collection, lambda group, meeting_time: groups.append(group)).run_round()
+    assert len(groups) == 1
+    assert collection.count_documents({}) == 0
+
+
+def test_live_claims_are_left_alone():
+    collection = mongomock.MongoClient().db.waiting_users
+    waiting(collection, 5, claim="other", claimed_at=datetime.utcnow())
+    groups = []
+    assert scheduler(collection, lambda group, meeting_time: groups.append(group)).run_round() == []
+    assert groups == []
+    assert collection.count_documents({}) == 5
+
+
+def test_failed_group_is_given_back():
+    collection = mongomock.MongoClient().db.waiting_users
+    waiting(collection, 5)
+
+    def fail(group, meeting_time):
+        raise RuntimeError("could not store the event")
+
+    scheduler(collection, fail).run_round()
+    assert collection.count_documents({"claim": None}) == 5
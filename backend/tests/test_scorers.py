@@ -0,0 +1,144 @@
+import asyncio
+import threading
+
+import pytest
+
+from features import FEATURES
+from local_scorer import BASE_SCORE, LexiconScorer
+from scorers import FeatureScorer, LocalScorer
+
+REMOTE_SCORES = {feature: 4.0 for feature in FEATURES}
+
+
+class StubRemote:
+    """Stands in for GeminiScorer; records calls and can be made to fail."""
+
+    name = "stub"
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def score_questionnaire(self, pairs):
+        self.calls.append(pairs)
+        if self.fail:
+            raise RuntimeError("remote down")
+        return dict(REMOTE_SCORES)
+
+    async def score_questionnaire_async(self, pairs):
+        return self.score_questionnaire(pairs)
+
+
+PAIRS = [("What do you do on Friday night?", "I love meeting new friends at parties")]
+
+
+def score(answer, feature):
+    return LexiconScorer().score_answer("question", answer)[feature]
+
+
+def test_neutral_answer_scores_the_base():
+    assert LexiconScorer().score_answer("question", "") == {feature: BASE_SCORE for feature in FEATURES}
+
+
+def test_words_match_on_their_stem():
+    assert score("party", "extroversion") > BASE_SCORE
+    assert score("parties", "extroversion") == score("party", "extroversion")
+    assert score("partying", "extroversion") == score("party", "extroversion")
+    assert score("dancing", "energy_level") == score("dance", "energy_level") > BASE_SCORE
+
+
+def test_negation_flips_the_next_word():
+    assert score("social", "extroversion") > BASE_SCORE
+    assert score("not social", "extroversion") < BASE_SCORE
+    assert score("I don't plan", "spontaneity") > BASE_SCORE
+    # Only the word straight after the negation is flipped
+    assert score("not really social", "extroversion") == BASE_SCORE + LexiconScorer().lexicon["extroversion"]["social"]
+
+
+def test_scores_are_clamped_to_the_scale():
+    assert score("party party party party friends social club", "extroversion") == 5.0
+    assert score("alone quiet shy introvert at home by myself", "extroversion") == 0.0
+
+
+def test_score_returns_one_dict_per_pair():
+    assert len(LexiconScorer().score(PAIRS * 3)) == 3
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        FeatureScorer(StubRemote(), LocalScorer(), policy="fastest")
+
+
+def test_local_policy_never_calls_remote():
+    remote = StubRemote()
+    scorer = FeatureScorer(remote, LocalScorer(), policy="local")
+    assert scorer.score(PAIRS) == LocalScorer().score_questionnaire(PAIRS)
+    assert asyncio.run(scorer.score_async(PAIRS)) == LocalScorer().score_questionnaire(PAIRS)
+    assert remote.calls == []
+
+
+def test_remote_policy_uses_remote():
+    scorer = FeatureScorer(StubRemote(), LocalScorer(), policy="remote")
+    assert scorer.score(PAIRS) == REMOTE_SCORES
+    assert asyncio.run(scorer.score_async(PAIRS)) == REMOTE_SCORES
+
+
+def test_remote_policy_falls_back_to_local():
+    scorer = FeatureScorer(StubRemote(fail=True), LocalScorer(), policy="remote")
+    assert scorer.score(PAIRS) == LocalScorer().score_questionnaire(PAIRS)
+    assert asyncio.run(scorer.score_async(PAIRS)) == LocalScorer().score_questionnaire(PAIRS)
+
+
+def test_local_first_answers_locally_then_refines():
+    refined = []
+    done = threading.Event()
+
+    def on_refined(scores):
+        refined.append(scores)
+        done.set()
+
+    scorer = FeatureScorer(StubRemote(), LocalScorer(), policy="local_first")
+    assert scorer.score(PAIRS, on_refined=on_refined) == LocalScorer().score_questionnaire(PAIRS)
+    assert done.wait(5)
+    assert refined == [REMOTE_SCORES]
+
+
+def test_local_first_refines_only_when_asked():
+    remote = StubRemote()
+    scorer = FeatureScorer(remote, LocalScorer(), policy="local_first")
+    assert scorer.score(PAIRS, refine=False) == LocalScorer().score_questionnaire(PAIRS)
+    assert remote.calls == []
+
+    done = threading.Event()
+    scorer.refine(PAIRS, lambda scores: done.set())
+    assert done.wait(5)
+    assert remote.calls == [PAIRS]
+
+
+def test_local_first_skips_refining_no_answers():
+    remote = StubRemote()
+    scorer = FeatureScorer(remote, LocalScorer(), policy="local_first")
+    scorer.refine([], lambda scores: None)
+    assert remote.calls == []
+
+
+def test_local_first_async_refinement_awaits_the_callback():
+    refined = []
+
+    async def on_refined(scores):
+        refined.append(scores)
+
+    async def run():
+        scorer = FeatureScorer(StubRemote(), LocalScorer(), policy="local_first")
+        scores = await scorer.score_async(PAIRS, on_refined=on_refined)
+        for _ in range(10):
+            await asyncio.sleep(0)
+        return scores
+
+    assert asyncio.run(run()) == LocalScorer().score_questionnaire(PAIRS)
+    assert refined == [REMOTE_SCORES]
+
+
+def test_refinement_errors_are_swallowed():
+    scorer = FeatureScorer(StubRemote(fail=True), LocalScorer(), policy="local_first")
+    scorer._refine(PAIRS, on_refined=lambda scores: pytest.fail("refined despite the error"))
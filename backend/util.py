@@ -5,6 +5,7 @@ from fastapi import Depends, HTTPException, status # 👈 new imports
 from fastapi.security import SecurityScopes, HTTPAuthorizationCredentials, HTTPBearer # 👈 new imports
 
 from application.config import get_settings # 👈 new imports
+from app.core.token_cache import token_cache
 
 class UnauthorizedException(HTTPException):
     def __init__(self, detail: str, **kwargs):
@@ -35,6 +36,13 @@ class VerifyToken:
         if token is None:
             raise UnauthenticatedException
 
+        # Tokens verified earlier are served from the cache until they expire
+        if token_cache.is_revoked(token.credentials):
+            raise UnauthorizedException("Token has been revoked")
+        cached = token_cache.get(token.credentials, self.config.auth0_api_audience, self.config.auth0_issuer)
+        if cached is not None:
+            return cached
+
         # This gets the 'kid' from the passed token
         try:
             signing_key = self.jwks_client.get_signing_key_from_jwt(
@@ -56,5 +64,6 @@ class VerifyToken:
         except Exception as error:
             raise UnauthorizedException(str(error))
     
+        token_cache.put(token.credentials, payload, self.config.auth0_api_audience, self.config.auth0_issuer)
         return payload
         # 👆 new code
\ No newline at end of file
@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# Used when there are no venues, or every venue is full for a meeting time.
+DEFAULT_LOCATION = {"name": "Evanston", "address": "1501 Maple Ave, Evanston, IL 60201"}
+
+
+class VenueCache:
+    """
+    Keeps the venue list in memory and assigns venues without overbooking.
+
+    Venues are read from `locations` at most once every `ttl` seconds. A
+    venue takes up to its `capacity` field (or `default_capacity`) groups
+    per meeting time. Bookings are counted in `bookings`, one document per
+    venue and meeting time, with a conditional $inc so that processes
+    sharing the database never push a venue past its capacity.
+
+    For each meeting time the venues that still have room are kept in a
+    list; assign() picks one at random and drops it by swapping with the
+    last entry, so a pick is O(1) whatever the number of venues.
+    """
+
+    def __init__(self, locations, bookings, ttl=300, default_capacity=3):
+        self.locations = locations
+        self.bookings = bookings
+        self.ttl = ttl
+        self.default_capacity = default_capacity
+        self._venues = []
+        self._loaded_at = None
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def _capacity(self, venue):
+        return int(venue.get("capacity", self.default_capacity))
+
+    def _refresh(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        try:
+            self._venues = list(self.locations.find())
+        except Exception as e:
+            print(f"Error loading venues: {str(e)}")
+            if self._loaded_at is None:
+                return
+        self._loaded_at = time.monotonic()
+        self._open.clear()
+
+    def _open_venues(self, meeting_time):
+        """Venues with room left for `meeting_time`, as known to this process."""
+        venues = self._open.get(meeting_time)
+        if venues is None:
+            booked = {
+                doc["venue_id"]: doc["count"]
+                for doc in self.bookings.find({"meeting_time": meeting_time}, {"venue_id": 1, "count": 1})
+            }
+            venues = [venue for venue in self._venues if booked.get(venue["_id"], 0) < self._capacity(venue)]
+            self._open[meeting_time] = venues
+        return venues
+
+    def _book(self, venue, meeting_time):
+        """
+        Take one slot at `venue`. Returns the venue's booking count after
+        this one, or None if it was already full.
+        """
+        try:
+            booking = self.bookings.find_one_and_update(
+                {
+                    "_id": f"{venue['_id']}|{meeting_time}",
+                    "count": {"$lt": self._capacity(venue)}
+                },
+                {
+                    "$inc": {"count": 1},
+                    "$setOnInsert": {"venue_id": venue["_id"], "meeting_time": meeting_time}
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return booking["count"]
+        except DuplicateKeyError:
+            # The booking exists and is already at capacity
+            return None
+
+    def assign(self, meeting_time):
+        """A venue with room for one more group at `meeting_time`."""
+        with self._lock:
+            self._refresh()
+            try:
+                venues = self._open_venues(meeting_time)
+            except Exception as e:
+                print(f"Error loading venue bookings: {str(e)}")
+                return random.choice(self._venues) if self._venues else DEFAULT_LOCATION
+
+            while venues:
+                index = random.randrange(len(venues))
+                venue = venues[index]
+                try:
+                    count = self._book(venue, meeting_time)
+                except Exception as e:
+                    print(f"Error booking venue {venue.get('name')}: {str(e)}")
+                    return venue
+                if count is None or count >= self._capacity(venue):
+                    venues[index] = venues[-1]
+                    venues.pop()
+                if count is not None:
+                    return venue
+
+        print(f"Every venue is full for {meeting_time}")
+        return DEFAULT_LOCATION
+
+    def release(self, venue, meeting_time):
+        """Give back a slot taken by assign(), e.g. when the event could not be stored."""
+        if "_id" not in venue:
+            return
+        self.bookings.update_one(
+            {"_id": f"{venue['_id']}|{meeting_time}", "count": {"$gt": 0}},
+            {"$inc": {"count": -1}}
+        )
+        with self._lock:
+            self._open.pop(meeting_time, None)
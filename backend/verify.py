@@ -1,10 +1,10 @@
 from jose import jwt
-from urllib.request import urlopen
-import json
 import os
 from dotenv import load_dotenv
 from fastapi import HTTPException, Security, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.core.token_cache import token_cache
+from app.core.jwks import jwks_cache
 
 # Load environment variables from a .env file
 load_dotenv()
@@ -16,44 +16,40 @@ ALGORITHMS = os.getenv("ALGORITHMS", "").split(",")
 security = HTTPBearer()
 
 class VerifyToken:
-    def __init__(self):
-        self.jwks = None
-        self._fetch_jwks()
+    """
+    Signing keys come from the shared JWKS cache, which is loaded in the
+    background, so creating this class does no network I/O.
+    """
 
-    def _fetch_jwks(self):
-        try:
-            jwks = urlopen(f"https://{AUTH0_DOMAIN}/.well-known/jwks.json")
-            self.jwks = json.loads(jwks.read())
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Unable to fetch JWKS: {str(e)}")
-
-    def get_rsa_key(self, token):
+    async def get_rsa_key(self, token):
         try:
             header = jwt.get_unverified_header(token)
-            for key in self.jwks["keys"]:
-                if key["kid"] == header["kid"]:
-                    return {
-                        "kty": key["kty"],
-                        "kid": key["kid"],
-                        "use": key["use"],
-                        "n": key["n"],
-                        "e": key["e"]
-                    }
-            raise HTTPException(status_code=401, detail="Invalid token")
         except Exception as e:
             raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
+        rsa_key = await jwks_cache.get_key(header.get("kid"))
+        if rsa_key is None:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        return rsa_key
 
     async def verify_token(self, credentials: HTTPAuthorizationCredentials = Security(security)):
+        token = credentials.credentials
+        if token_cache.is_revoked(token):
+            raise HTTPException(status_code=401, detail="Token has been revoked")
+        issuer = f"https://{AUTH0_DOMAIN}/"
+        cached = token_cache.get(token, API_IDENTIFIER, issuer)
+        if cached is not None:
+            return cached
+
+        rsa_key = await self.get_rsa_key(token)
         try:
-            token = credentials.credentials
-            rsa_key = self.get_rsa_key(token)
             payload = jwt.decode(
                 token,
                 rsa_key,
                 algorithms=ALGORITHMS,
                 audience=API_IDENTIFIER,
-                issuer=f"https://{AUTH0_DOMAIN}/"
+                issuer=issuer
             )
+            token_cache.put(token, payload, API_IDENTIFIER, issuer)
             return payload
         except jwt.ExpiredSignatureError:
             raise HTTPException(status_code=401, detail="Token expired")
@@ -136,7 +136,7 @@ const RequestForm = () => {
         navigate('/match', { state: { event: data.event } });
       } else {
         // Otherwise we're waiting for a match
-        navigate('/waiting', { state: { meeting_time: formattedTime } });
+        navigate('/waiting', { state: { meeting_time: formattedTime, queue_id: data.queue_id } });
       }
     } catch (err) {
       setError(err instanceof Error ? err.message : 'An error occurred');
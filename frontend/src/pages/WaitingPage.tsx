@@ -1,7 +1,6 @@
 import React, { useEffect, useState } from "react";
-import { useNavigate } from "react-router";
+import { useLocation, useNavigate } from "react-router";
 import { FaSpinner } from "react-icons/fa";
-import axios from "axios";
 
 interface QueueStatus {
   status: "waiting" | "matched";
@@ -17,59 +16,40 @@ interface QueueStatus {
 
 export default () => {
   const navigate = useNavigate();
+  const location = useLocation();
   const [status, setStatus] = useState<QueueStatus>({ status: "waiting" });
-  const [location, setLocation] = useState<string>("");
-
-  // List of possible locations (for now, randomly selected)
-  const locations = [
-    "The Violet Hour",
-    "Three Dots and a Dash",
-    "The Aviary",
-    "Lost Lake",
-    "The Whistler",
-    "Scofflaw",
-    "The Office",
-    "The Drifter",
-    "The Berkshire Room",
-    "The Broken Shaker"
-  ];
 
   useEffect(() => {
-    // Start polling for updates
-    const pollInterval = setInterval(async () => {
-      try {
-        const response = await axios.get("http://localhost:5001/queue");
-        const userInEvent = response.data.find((user: any) => user.event_id);
-        
-        if (userInEvent) {
-          setStatus({
-            status: "matched",
-            event: {
-              event_id: userInEvent.event_id,
-              users: userInEvent.users,
-              meeting_time: userInEvent.meeting_time
-            }
-          });
-          // Select a random location
-          setLocation(locations[Math.floor(Math.random() * locations.length)]);
-          clearInterval(pollInterval);
-          // Wait a moment before redirecting to show the match
-          setTimeout(() => {
-            navigate("/match", {
-              state: {
-                event: userInEvent,
-                location
-              }
-            });
-          }, 2000);
-        }
-      } catch (error) {
-        console.error("Error polling queue:", error);
-      }
-    }, 5000); // Poll every 5 seconds
+    const queueId = (location.state as { queue_id?: string } | null)?.queue_id;
+    if (!queueId) return;
+
+    // The server pushes a "matched" event as soon as our group is formed
+    const source = new EventSource(`http://localhost:5001/queue/${queueId}/events`, {
+      withCredentials: true,
+    });
+
+    source.addEventListener("matched", (message) => {
+      const { event } = JSON.parse((message as MessageEvent).data);
+      source.close();
+      setStatus({ status: "matched", event });
+      // Wait a moment before redirecting to show the match
+      setTimeout(() => {
+        navigate("/match", { state: { event } });
+      }, 2000);
+    });
+
+    source.addEventListener("expired", () => {
+      source.close();
+      navigate("/");
+    });
+
+    source.addEventListener("gone", () => {
+      source.close();
+      console.error("Queue entry no longer exists");
+    });
 
-    return () => clearInterval(pollInterval);
-  }, [navigate]);
+    return () => source.close();
+  }, [navigate, location.state]);
 
   return (
     <div className="min-h-screen flex items-center justify-center bg-gray-50">